@@ -0,0 +1,161 @@
+"""Описание моделей для JSON API и сериализация строк values().
+
+Ответ собирается из словарей, которые возвращает values(), без
+создания объектов моделей. В выборку попадают только поля из ?fields=,
+а связи из ?include= подтягиваются в тот же запрос через JOIN, как
+при select_related, и вкладываются в ответ объектом вместо id.
+"""
+from django.contrib.auth import get_user_model
+
+from posts.models import Comment, Follow, Group, Post
+from posts.utils import COMMENT_ORDERING, POST_ORDERING
+
+User = get_user_model()
+
+
+def image_url(name):
+    if not name:
+        return None
+    return Post._meta.get_field('image').storage.url(name)
+
+
+def _names(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class Resource:
+    def __init__(self, queryset, ordering, fields, includes=None,
+                 converters=None):
+        self.queryset = queryset
+        self.ordering = ordering
+        # имя поля в ответе -> lookup для values()
+        self.fields = fields
+        # имя поля -> (связь, ресурс), объект которого встаёт вместо id
+        self.includes = includes or {}
+        # имя поля -> функция, которая готовит значение для ответа
+        self.converters = converters or {}
+
+    def parse(self, fields=None, include=None):
+        """Поля ответа и связи для вложения из параметров запроса."""
+        names = _names(fields) if fields else list(self.fields)
+        unknown = set(names) - set(self.fields)
+        if unknown:
+            raise ValueError(
+                'Неизвестные поля: ' + ', '.join(sorted(unknown)))
+        includes = _names(include) if include else []
+        unknown = set(includes) - set(self.includes)
+        if unknown:
+            raise ValueError(
+                'Нельзя вложить: ' + ', '.join(sorted(unknown)))
+        names += [name for name in includes if name not in names]
+        return names, includes
+
+    def columns(self, names, includes):
+        """Lookup'ы для values(), включая поля вложенных объектов."""
+        columns = []
+        for name in names:
+            if name in includes:
+                relation, resource = self.includes[name]
+                columns += [
+                    f'{relation}__{lookup}'
+                    for lookup in resource.fields.values()
+                ]
+            else:
+                columns.append(self.fields[name])
+        columns += [
+            name.lstrip('-') for name in self.ordering
+            if name.lstrip('-') not in columns
+        ]
+        return columns
+
+    def serialize(self, row, names, includes, prefix=''):
+        data = {}
+        for name in names:
+            if name in includes:
+                relation, resource = self.includes[name]
+                data[name] = resource.nested(row, f'{prefix}{relation}__')
+                continue
+            value = row[prefix + self.fields[name]]
+            converter = self.converters.get(name)
+            data[name] = converter(value) if converter else value
+        return data
+
+    def nested(self, row, prefix):
+        names = list(self.fields)
+        # необязательная связь (пост без группы) приходит строкой из None
+        if row[prefix + self.fields[names[0]]] is None:
+            return None
+        return self.serialize(row, names, (), prefix)
+
+
+USER = Resource(
+    queryset=lambda: User.objects.all(),
+    ordering=('username', 'pk'),
+    fields={
+        'id': 'id',
+        'username': 'username',
+        'first_name': 'first_name',
+        'last_name': 'last_name',
+    },
+)
+
+GROUP = Resource(
+    queryset=lambda: Group.objects.all(),
+    ordering=('slug', 'pk'),
+    fields={
+        'id': 'id',
+        'slug': 'slug',
+        'title': 'title',
+        'description': 'description',
+        'posts_count': 'posts_count',
+    },
+)
+
+POST = Resource(
+    queryset=lambda: Post.objects.all(),
+    ordering=POST_ORDERING,
+    fields={
+        'id': 'id',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'author': 'author_id',
+        'group': 'group_id',
+        'image': 'image',
+        'comments_count': 'comments_count',
+    },
+    includes={
+        'author': ('author', USER),
+        'group': ('group', GROUP),
+    },
+    converters={'image': image_url},
+)
+
+COMMENT = Resource(
+    queryset=lambda: Comment.objects.all(),
+    ordering=COMMENT_ORDERING,
+    fields={
+        'id': 'id',
+        'post': 'post_id',
+        'author': 'author_id',
+        'text': 'text',
+        'created': 'created',
+    },
+    includes={
+        'author': ('author', USER),
+        'post': ('post', POST),
+    },
+)
+
+FOLLOW = Resource(
+    queryset=lambda: Follow.objects.all(),
+    ordering=('author', 'pk'),
+    fields={
+        'id': 'id',
+        'user': 'user_id',
+        'author': 'author_id',
+    },
+    includes={
+        'user': ('user', USER),
+        'author': ('author', USER),
+    },
+)
@@ -0,0 +1,196 @@
+import json
+from http import HTTPStatus
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+
+from core.testing import QueryBudgetTestMixin
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(API_PAGE_SIZE=2)
+class ApiReadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user, text=f'Пост {i}',
+                group=cls.group if i % 2 else None)
+            for i in range(5)
+        ]
+        cls.posts.reverse()
+        cls.comment = Comment.objects.create(
+            post=cls.posts[0], author=cls.user, text='Комментарий')
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_post_pages(self):
+        """Список постов отдаётся страницами по курсору до конца."""
+        url = reverse('api:post_list')
+        seen = []
+        cursor = None
+        while True:
+            data = self.client.get(
+                url, {'cursor': cursor} if cursor else {}).json()
+            seen += [post['id'] for post in data['results']]
+            cursor = data['next']
+            if cursor is None:
+                break
+        self.assertEqual(seen, [post.pk for post in self.posts])
+
+    def test_sparse_fields(self):
+        """?fields= оставляет в ответе только перечисленные поля."""
+        data = self.client.get(
+            reverse('api:post_list'), {'fields': 'id,text'}).json()
+        self.assertEqual(
+            data['results'][0],
+            {'id': self.posts[0].pk, 'text': self.posts[0].text})
+
+    def test_include_nests_related_in_one_query(self):
+        """include=author,group вкладывает объекты одним запросом."""
+        url = reverse('api:post_list')
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(
+                url, {'fields': 'id', 'include': 'author,group'}).json()
+        self.assertEqual(len(queries), 1)
+        first, second = data['results']
+        self.assertEqual(first['author']['username'], 'author')
+        self.assertIsNone(first['group'])
+        self.assertEqual(second['group']['slug'], self.group.slug)
+
+    def test_unknown_fields(self):
+        for params in ({'fields': 'id,password'}, {'include': 'comments'}):
+            with self.subTest(params=params):
+                response = self.client.get(reverse('api:post_list'), params)
+                self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_filters_and_details(self):
+        """Фильтры списка и отдельные объекты."""
+        data = self.client.get(
+            reverse('api:post_list'), {'group': self.group.slug}).json()
+        self.assertTrue(all(
+            post['group'] == self.group.pk for post in data['results']))
+        urls = {
+            reverse('api:post_detail', args=[self.posts[0].pk]): 'id',
+            reverse('api:group_detail', args=[self.group.slug]): 'slug',
+            reverse('api:comment_detail', args=[self.comment.pk]): 'text',
+            reverse('api:comment_list', args=[self.posts[0].pk]): 'results',
+            reverse('api:group_list'): 'results',
+        }
+        for url, key in urls.items():
+            with self.subTest(url=url):
+                self.assertIn(key, self.client.get(url).json())
+
+    def test_not_found_is_json(self):
+        response = self.client.get(
+            reverse('api:post_detail', args=[self.posts[0].pk + 100]))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertEqual(response.json()['detail'], 'Не найдено')
+
+
+class ApiWriteTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def send(self, method, url, data=None):
+        return getattr(self.client, method)(
+            url, json.dumps(data or {}), content_type='application/json')
+
+    def test_anonymous_cannot_write(self):
+        response = Client().post(
+            reverse('api:post_list'), {'text': 'Пост'})
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
+    def test_create_edit_delete_post(self):
+        response = self.send('post', reverse('api:post_list'),
+                             {'text': 'Новый пост'})
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        url = reverse('api:post_detail', args=[response.json()['id']])
+        response = self.send('patch', url, {'text': 'Исправленный'})
+        self.assertEqual(response.json()['text'], 'Исправленный')
+        response = self.send('post', reverse('api:post_list'), {'text': ''})
+        self.assertIn('text', response.json()['errors'])
+        self.assertEqual(
+            self.send('delete', url).status_code, HTTPStatus.NO_CONTENT)
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_form_encoded_patch(self):
+        url = reverse('api:post_detail', args=[self.post.pk])
+        response = self.client.patch(
+            url, urlencode({'text': 'Из формы'}),
+            content_type='application/x-www-form-urlencoded')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json()['text'], 'Из формы')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text, 'Из формы')
+        self.assertWithinQueryBudget(response)
+
+    def test_delete_post_with_comments(self):
+        """Каскад комментариев не добавляет запросов на каждый из них."""
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.other, text=f'Ответ {i}')
+            for i in range(5))
+        url = reverse('api:post_detail', args=[self.post.pk])
+        response = self.send('delete', url)
+        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+        self.assertFalse(Comment.objects.exists())
+        self.assertWithinQueryBudget(response)
+
+    def test_unsupported_patch_body(self):
+        url = reverse('api:post_detail', args=[self.post.pk])
+        response = self.client.patch(
+            url, 'text=Текст', content_type='text/plain')
+        self.assertEqual(
+            response.status_code, HTTPStatus.UNSUPPORTED_MEDIA_TYPE)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text, 'Пост')
+
+    def test_only_author_edits(self):
+        self.client.force_login(self.other)
+        url = reverse('api:post_detail', args=[self.post.pk])
+        response = self.send('patch', url, {'text': 'Чужой'})
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text, 'Пост')
+
+    def test_comment(self):
+        self.client.force_login(self.other)
+        response = self.send(
+            'post', reverse('api:comment_list', args=[self.post.pk]),
+            {'text': 'Комментарий'})
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertEqual(response.json()['author'], self.other.pk)
+
+    def test_follow_and_unfollow(self):
+        url = reverse('api:follow_list')
+        response = self.send('post', url, {'author': 'other'})
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        data = self.client.get(url, {'include': 'author'}).json()
+        self.assertEqual(
+            data['results'][0]['author']['username'], 'other')
+        self.send('delete', reverse('api:follow_detail', args=['other']))
+        self.assertFalse(Follow.objects.exists())
+        response = self.send('post', url, {'author': 'author'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_method_not_allowed(self):
+        response = self.send('put', reverse('api:group_list'))
+        self.assertEqual(response.status_code, HTTPStatus.METHOD_NOT_ALLOWED)
+        self.assertEqual(response['Allow'], 'GET')
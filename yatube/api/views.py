@@ -0,0 +1,253 @@
+"""JSON API для постов, групп, комментариев и подписок.
+
+Списки отдаются страницами по курсору: {"results": [...], "next": ...,
+"previous": ...}. Параметры ?fields= и ?include= описаны в
+api.resources. Запись требует входа на сайт (сессия и CSRF-токен,
+как у HTML-форм), тело запроса — JSON или обычная форма.
+"""
+import json
+from functools import wraps
+from http import HTTPStatus
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse, QueryDict
+from django.shortcuts import get_object_or_404
+
+from core.queries import query_budget
+from posts.forms import CommentForm, PostForm
+from posts.models import Comment, Follow, Group, Post, User
+from posts.utils import CursorPaginator
+
+from .resources import COMMENT, FOLLOW, GROUP, POST
+
+
+class ApiError(Exception):
+    def __init__(self, status, detail, errors=None):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+        self.errors = errors
+
+    def response(self):
+        data = {'detail': self.detail}
+        if self.errors is not None:
+            data['errors'] = self.errors
+        return JsonResponse(data, status=self.status)
+
+
+def api_view(*methods):
+    """Пропускает только methods и отвечает на ошибки JSON, а не HTML."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            try:
+                if request.method not in methods:
+                    raise ApiError(HTTPStatus.METHOD_NOT_ALLOWED,
+                                   'Метод не поддерживается')
+                return view(request, *args, **kwargs)
+            except Http404:
+                error = ApiError(HTTPStatus.NOT_FOUND, 'Не найдено')
+            except ApiError as api_error:
+                error = api_error
+            response = error.response()
+            if error.status == HTTPStatus.METHOD_NOT_ALLOWED:
+                response['Allow'] = ', '.join(methods)
+            return response
+        return wrapper
+    return decorator
+
+
+def _require_login(request):
+    if not request.user.is_authenticated:
+        raise ApiError(HTTPStatus.UNAUTHORIZED, 'Нужно войти на сайт')
+
+
+def _require_author(request, author_id):
+    _require_login(request)
+    if request.user.pk != author_id:
+        raise ApiError(HTTPStatus.FORBIDDEN, 'Изменять может только автор')
+
+
+def _payload(request):
+    if request.content_type != 'application/json':
+        return _form_payload(request)
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, 'Некорректный JSON')
+    if not isinstance(data, dict):
+        raise ApiError(HTTPStatus.BAD_REQUEST, 'Ожидается объект JSON')
+    return data
+
+
+def _form_payload(request):
+    if request.method == 'POST':
+        return request.POST
+    # тело формы Django разбирает только у POST
+    if request.content_type == 'application/x-www-form-urlencoded':
+        return QueryDict(request.body, encoding=request.encoding)
+    raise ApiError(HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+                   'Ожидается JSON или application/x-www-form-urlencoded')
+
+
+def _invalid(form):
+    return ApiError(HTTPStatus.BAD_REQUEST, 'Данные не прошли проверку',
+                    errors=form.errors.get_json_data())
+
+
+def _options(resource, request):
+    try:
+        return resource.parse(
+            request.GET.get('fields'), request.GET.get('include'))
+    except ValueError as error:
+        raise ApiError(HTTPStatus.BAD_REQUEST, str(error))
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, 'limit должен быть числом')
+    return min(max(limit, 1), settings.API_MAX_PAGE_SIZE)
+
+
+def list_response(resource, queryset, request):
+    names, includes = _options(resource, request)
+    rows = queryset.values(*resource.columns(names, includes))
+    page = CursorPaginator(rows, _limit(request), resource.ordering).get_page(
+        request.GET.get('cursor'))
+    return JsonResponse({
+        'results': [
+            resource.serialize(row, names, includes) for row in page
+        ],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+def detail_response(resource, queryset, request, status=HTTPStatus.OK):
+    names, includes = _options(resource, request)
+    row = queryset.values(*resource.columns(names, includes)).first()
+    if row is None:
+        raise Http404
+    return JsonResponse(
+        resource.serialize(row, names, includes), status=status)
+
+
+@query_budget(12)
+@api_view('GET', 'POST')
+def post_list(request):
+    if request.method == 'POST':
+        _require_login(request)
+        form = PostForm(_payload(request), files=request.FILES or None)
+        if not form.is_valid():
+            raise _invalid(form)
+        post = form.save(commit=False)
+        post.author = request.user
+        post.save()
+        return detail_response(POST, Post.objects.filter(pk=post.pk),
+                               request, status=HTTPStatus.CREATED)
+    posts = POST.queryset()
+    group = request.GET.get('group')
+    if group:
+        posts = posts.filter(group=get_object_or_404(
+            Group.objects.only('pk'), slug=group))
+    author = request.GET.get('author')
+    if author:
+        posts = posts.filter(author=get_object_or_404(
+            User.objects.only('pk'), username=author))
+    return list_response(POST, posts, request)
+
+
+@query_budget(9)
+@api_view('GET', 'PATCH', 'DELETE')
+def post_detail(request, post_id):
+    if request.method == 'GET':
+        return detail_response(POST, POST.queryset().filter(pk=post_id),
+                               request)
+    post = get_object_or_404(Post, pk=post_id)
+    _require_author(request, post.author_id)
+    if request.method == 'DELETE':
+        post.delete()
+        return HttpResponse(status=HTTPStatus.NO_CONTENT)
+    data = {'text': post.text, 'group': post.group_id}
+    # items() даёт последние значения полей и у QueryDict
+    data.update(_payload(request).items())
+    form = PostForm(data, instance=post)
+    if not form.is_valid():
+        raise _invalid(form)
+    form.save()
+    return detail_response(POST, Post.objects.filter(pk=post.pk), request)
+
+
+@query_budget(3)
+@api_view('GET')
+def group_list(request):
+    return list_response(GROUP, GROUP.queryset(), request)
+
+
+@query_budget(3)
+@api_view('GET')
+def group_detail(request, slug):
+    return detail_response(GROUP, GROUP.queryset().filter(slug=slug),
+                           request)
+
+
+@query_budget(12)
+@api_view('GET', 'POST')
+def comment_list(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    if request.method == 'POST':
+        _require_login(request)
+        form = CommentForm(_payload(request))
+        if not form.is_valid():
+            raise _invalid(form)
+        comment = form.save(commit=False)
+        comment.author = request.user
+        comment.post = post
+        comment.save()
+        return detail_response(COMMENT, Comment.objects.filter(pk=comment.pk),
+                               request, status=HTTPStatus.CREATED)
+    return list_response(
+        COMMENT, COMMENT.queryset().filter(post_id=post_id), request)
+
+
+@query_budget(8)
+@api_view('GET', 'DELETE')
+def comment_detail(request, comment_id):
+    if request.method == 'GET':
+        return detail_response(
+            COMMENT, COMMENT.queryset().filter(pk=comment_id), request)
+    comment = get_object_or_404(Comment, pk=comment_id)
+    _require_author(request, comment.author_id)
+    comment.delete()
+    return HttpResponse(status=HTTPStatus.NO_CONTENT)
+
+
+@query_budget(12)
+@api_view('GET', 'POST')
+def follow_list(request):
+    """Подписки текущего пользователя."""
+    _require_login(request)
+    if request.method == 'GET':
+        return list_response(
+            FOLLOW, FOLLOW.queryset().filter(user=request.user), request)
+    username = _payload(request).get('author')
+    author = get_object_or_404(User.objects.only('pk'), username=username)
+    if author == request.user:
+        raise ApiError(HTTPStatus.BAD_REQUEST,
+                       'Нельзя подписаться на себя')
+    follow, created = Follow.objects.get_or_create(
+        user=request.user, author=author)
+    return detail_response(
+        FOLLOW, Follow.objects.filter(pk=follow.pk), request,
+        status=HTTPStatus.CREATED if created else HTTPStatus.OK)
+
+
+@query_budget(8)
+@api_view('DELETE')
+def follow_detail(request, username):
+    _require_login(request)
+    author = get_object_or_404(User.objects.only('pk'), username=username)
+    Follow.objects.filter(user=request.user, author=author).delete()
+    return HttpResponse(status=HTTPStatus.NO_CONTENT)
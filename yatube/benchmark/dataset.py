@@ -0,0 +1,106 @@
+"""Синтетический набор данных заданного размера для замеров."""
+import random
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from posts import counters, search, timeline
+from posts.models import Comment, Follow, Group, Post
+from posts.transfer import keep_dates
+
+User = get_user_model()
+
+PASSWORD = 'benchmark'
+BATCH_SIZE = 1000
+WORDS = (
+    'котик', 'собака', 'погода', 'город', 'книга', 'музыка', 'море',
+    'поезд', 'работа', 'отпуск', 'кофе', 'горы', 'фильм', 'новости',
+)
+
+
+class Scale:
+    """Размер набора данных.
+
+    follow_density — доля остальных пользователей, на которых в среднем
+    подписан каждый пользователь.
+    """
+
+    def __init__(self, users=100, groups=10, posts=2000, comments=5000,
+                 follow_density=0.1):
+        self.users = users
+        self.groups = groups
+        self.posts = posts
+        self.comments = comments
+        self.follow_density = follow_density
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def _bulk_create(model, objects):
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, BATCH_SIZE))
+        if not batch:
+            return
+        with transaction.atomic():
+            model.objects.bulk_create(batch, ignore_conflicts=model is Follow)
+
+
+def generate(scale, seed=0):
+    """Заполняет базу и возвращает объекты, нужные для построения URL."""
+    rng = random.Random(seed)
+    now = timezone.now()
+    password = make_password(PASSWORD)
+    _bulk_create(User, (
+        User(username=f'user{i}', password=password)
+        for i in range(scale.users)))
+    _bulk_create(Group, (
+        Group(title=f'Группа {i}', slug=f'group-{i}',
+              description=_text(rng, 10))
+        for i in range(scale.groups)))
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    group_ids = list(Group.objects.values_list('pk', flat=True)) + [None]
+    with keep_dates():
+        _bulk_create(Post, (
+            Post(author_id=rng.choice(user_ids),
+                 group_id=rng.choice(group_ids),
+                 text=_text(rng, rng.randint(5, 60)),
+                 pub_date=now - timedelta(minutes=i))
+            for i in range(scale.posts)))
+        post_ids = list(Post.objects.values_list('pk', flat=True))
+        _bulk_create(Comment, (
+            Comment(post_id=rng.choice(post_ids),
+                    author_id=rng.choice(user_ids),
+                    text=_text(rng, rng.randint(3, 20)),
+                    created=now - timedelta(seconds=i))
+            for i in range(scale.comments)))
+    follows_per_user = int(scale.follow_density * (len(user_ids) - 1))
+    _bulk_create(Follow, (
+        Follow(user_id=user_id, author_id=author_id)
+        for user_id in user_ids
+        for author_id in rng.sample(user_ids, follows_per_user)
+        if author_id != user_id))
+    counters.recount()
+    timeline.rebuild()
+    search.rebuild()
+    post = Post.objects.select_related('author').latest('pub_date')
+    other = Post.objects.exclude(author=post.author).select_related(
+        'author').order_by('-pub_date').first()
+    return {
+        # вход выполняется под автором поста, чтобы открывалось
+        # его редактирование, а профиль и подписка — на другого автора
+        'user': post.author,
+        'author': other.author if other else post.author,
+        'group': Group.objects.first(),
+        'post': post,
+        'word': WORDS[0],
+    }
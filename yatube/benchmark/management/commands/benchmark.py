@@ -0,0 +1,130 @@
+import os
+import tempfile
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from benchmark import dataset, report, runner
+
+
+class Command(BaseCommand):
+    help = ('Создаёт временную базу с синтетическими данными и замеряет '
+            'задержку, пропускную способность и число SQL-запросов '
+            'для всех маршрутов posts и users.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--comments', type=int, default=5000)
+        parser.add_argument(
+            '--follow-density', type=float, default=0.1,
+            help='Доля пользователей, на которых подписан каждый.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Число замеряемых запросов к каждому маршруту.')
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--server', action='store_true',
+            help='Ходить по HTTP в локальный WSGI-сервер, '
+                 'а не через тестовый клиент.')
+        parser.add_argument(
+            '--concurrency', type=int, default=4,
+            help='Число параллельных клиентов в режиме --server.')
+        parser.add_argument(
+            '--db-latency', type=float, default=0.0,
+            help='Задержка каждого SQL-запроса в миллисекундах: '
+                 'имитация медленной базы.')
+        parser.add_argument(
+            '--lookup-workers', type=int, default=None,
+            help='Потоков для параллельных запросов представлений '
+                 '(LOOKUP_WORKERS), 0 — без пула.')
+        parser.add_argument(
+            '--route', action='append', dest='routes',
+            help='Замерить только этот маршрут, например posts:index.')
+        parser.add_argument('--output', help='Сохранить результаты в JSON.')
+        parser.add_argument(
+            '--baseline', help='Сравнить с ранее сохранённым JSON.')
+        parser.add_argument(
+            '--threshold', type=float, default=10.0,
+            help='Допустимый рост p95 в процентах при сравнении.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['posts'] < 1:
+            raise CommandError('Нужны хотя бы один пользователь и один пост.')
+        scale = dataset.Scale(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follow_density=options['follow_density'],
+        )
+        old_name = connection.settings_dict['NAME']
+        if options['server'] and connection.vendor == 'sqlite':
+            # общая база в памяти блокирует таблицы целиком и не выдерживает
+            # параллельных запросов, поэтому для сервера база в файле
+            connection.settings_dict['TEST']['NAME'] = os.path.join(
+                tempfile.gettempdir(), 'yatube_benchmark.sqlite3')
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = self.measure(scale, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        self.stdout.write(report.table(results))
+        templates = report.templates(results)
+        if templates:
+            self.stdout.write('Шаблоны, мс на ответ:\n' + templates)
+        meta = {
+            'scale': scale.as_dict(),
+            'driver': 'server' if options['server'] else 'client',
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'db_latency': options['db_latency'],
+            'lookup_workers': self.lookup_workers(options),
+        }
+        if options['output']:
+            report.save(report.build(results, meta), options['output'])
+            self.stdout.write(f'Результаты сохранены в {options["output"]}')
+        if options['baseline']:
+            self.check_baseline(results, options)
+
+    def measure(self, scale, options):
+        self.stdout.write('Генерация данных: {}'.format(', '.join(
+            f'{key}={value}' for key, value in scale.as_dict().items())))
+        data = dataset.generate(scale, seed=options['seed'])
+        with ExitStack() as stack:
+            stack.enter_context(override_settings(
+                LOOKUP_WORKERS=self.lookup_workers(options)))
+            if options['db_latency']:
+                stack.enter_context(
+                    runner.SlowDatabase(options['db_latency'] / 1000))
+            return runner.run(
+                data,
+                requests=options['requests'],
+                warmup=options['warmup'],
+                concurrency=options['concurrency'],
+                server=options['server'],
+                only=options['routes'],
+                progress=lambda name, result: self.stdout.write(
+                    f'{name}: p95 {result["p95"]} ms', ending='\n'),
+            )
+
+    def lookup_workers(self, options):
+        if options['lookup_workers'] is None:
+            return settings.LOOKUP_WORKERS
+        return options['lookup_workers']
+
+    def check_baseline(self, results, options):
+        lines, regressions = report.compare(
+            results, report.load(options['baseline']), options['threshold'])
+        self.stdout.write('\n'.join(lines))
+        if regressions:
+            raise CommandError(
+                f'Регрессии относительно {options["baseline"]}:\n'
+                + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Регрессий нет.'))
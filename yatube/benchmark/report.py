@@ -0,0 +1,89 @@
+"""Таблица результатов, сохранение базовой линии и сравнение с ней."""
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+import django
+
+COLUMNS = ('p50', 'p95', 'p99', 'rps', 'queries')
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build(results, options):
+    return {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'commit': _commit(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            **options,
+        },
+        'routes': results,
+    }
+
+
+def save(report, path):
+    with open(path, 'w', encoding='utf-8') as stream:
+        json.dump(report, stream, ensure_ascii=False, indent=2)
+        stream.write('\n')
+
+
+def load(path):
+    with open(path, encoding='utf-8') as stream:
+        return json.load(stream)
+
+
+def table(results):
+    lines = ['{:<32}{:>10}{:>10}{:>10}{:>10}{:>9}'.format(
+        'route', 'p50, ms', 'p95, ms', 'p99, ms', 'rps', 'queries')]
+    for name, result in results.items():
+        lines.append('{:<32}{:>10}{:>10}{:>10}{:>10}{:>9}'.format(
+            name, *(result[column] for column in COLUMNS)))
+    return '\n'.join(lines)
+
+
+def templates(results):
+    """Самые дорогие шаблоны маршрутов: своё время в мс на ответ."""
+    lines = []
+    for name, result in results.items():
+        times = result.get('templates')
+        if times:
+            lines.append(f'{name}: ' + ', '.join(
+                f'{template} {ms}' for template, ms in times.items()))
+    return '\n'.join(lines)
+
+
+def compare(results, baseline, threshold):
+    """Сравнивает с базовой линией и возвращает строки отчёта и регрессии.
+
+    Регрессией считается рост p95 больше чем на threshold процентов
+    или любой рост числа SQL-запросов.
+    """
+    lines, regressions = [], []
+    for name, result in results.items():
+        before = baseline['routes'].get(name)
+        if before is None:
+            lines.append(f'{name}: нет в базовой линии')
+            continue
+        change = (
+            (result['p95'] - before['p95']) / before['p95'] * 100
+            if before['p95'] else 0.0
+        )
+        queries = result['queries'] - before['queries']
+        line = (f'{name}: p95 {before["p95"]} -> {result["p95"]} ms '
+                f'({change:+.1f}%), queries {before["queries"]} -> '
+                f'{result["queries"]}')
+        lines.append(line)
+        if change > threshold or queries > 0:
+            regressions.append(line)
+    return lines, regressions
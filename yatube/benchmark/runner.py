@@ -0,0 +1,314 @@
+"""Прогон всех маршрутов posts.urls и users.urls с замером времени.
+
+Каждый маршрут вызывается тестовым клиентом Django или по HTTP через
+локальный WSGI-сервер. Для маршрута считаются перцентили задержки,
+число запросов в секунду и число SQL-запросов на один ответ, а с
+тестовым клиентом — ещё и время самых дорогих шаблонов.
+"""
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from socketserver import ThreadingMixIn
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import HTTPRedirectHandler, Request, build_opener
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core.queries import QueryRecorder
+from core.rendering import TemplateRecorder, TemplateReport
+
+# маршруты, которые нужно открывать под пользователем
+LOGIN_REQUIRED = {
+    'posts:post_create', 'posts:post_edit', 'posts:add_comment',
+    'posts:follow_index', 'posts:profile_follow', 'posts:profile_unfollow',
+    'users:logout', 'users:password_change', 'users:password_change_done',
+    'api:follow_list', 'posts:follow_events',
+}
+# маршруты без GET и бесконечные потоки событий
+SKIP = {
+    'api:follow_detail', 'posts:index_events', 'posts:group_events',
+    'posts:profile_events', 'posts:follow_events', 'posts:comment_events',
+}
+# маршруты, после которых сессия пропадает и вход нужно повторить
+RELOGIN = {'users:logout'}
+# дополнительные параметры строки запроса
+QUERY = {
+    'posts:search': lambda data: {'q': data['word']},
+}
+NAMESPACES = ('posts', 'users', 'api')
+PERCENTILES = (50, 95, 99)
+# сколько самых дорогих шаблонов маршрута попадает в результаты
+TEMPLATES_TOP = 5
+
+
+class Scenario:
+    def __init__(self, name, url, login):
+        self.name = name
+        self.url = url
+        self.login = login
+
+    def __repr__(self):
+        return f'<Scenario {self.name} {self.url}>'
+
+
+def _arguments(data):
+    user = data['user']
+    return {
+        'slug': data['group'].slug if data['group'] else None,
+        'username': data['author'].username,
+        'post_id': data['post'].pk,
+        'uidb64': urlsafe_base64_encode(force_bytes(user.pk)),
+        'token': default_token_generator.make_token(user),
+    }
+
+
+def _patterns(resolver, namespace):
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _patterns(pattern, namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield f'{namespace}:{pattern.name}', pattern
+
+
+def scenarios(data):
+    """Сценарии для всех именованных маршрутов приложений из NAMESPACES."""
+    arguments = _arguments(data)
+    resolver = get_resolver()
+    result = []
+    for namespace in NAMESPACES:
+        app_resolver = resolver.namespace_dict[namespace][1]
+        for name, pattern in _patterns(app_resolver, namespace):
+            kwargs = {
+                key: arguments.get(key)
+                for key in pattern.pattern.converters
+            }
+            if None in kwargs.values() or name in SKIP:
+                continue
+            url = reverse(name, kwargs=kwargs)
+            if name in QUERY:
+                url = f'{url}?{urlencode(QUERY[name](data))}'
+            result.append(Scenario(name, url, name in LOGIN_REQUIRED))
+    return result
+
+
+def percentile(values, percent):
+    """Перцентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(latencies, elapsed):
+    result = {
+        f'p{percent}': round(percentile(latencies, percent) * 1000, 3)
+        for percent in PERCENTILES
+    }
+    result['rps'] = round(len(latencies) / elapsed, 1) if elapsed else 0.0
+    return result
+
+
+class ClientDriver:
+    """Запросы через тестовый клиент Django, без сети."""
+
+    def __init__(self, user):
+        self.user = user
+        self.clients = {}
+
+    def _client(self, scenario):
+        if scenario.name in RELOGIN:
+            client = Client()
+            client.force_login(self.user)
+            return client
+        client = self.clients.get(scenario.login)
+        if client is None:
+            client = self.clients[scenario.login] = Client()
+            if scenario.login:
+                client.force_login(self.user)
+        return client
+
+    def request(self, scenario):
+        client = self._client(scenario)
+        started = time.perf_counter()
+        response = client.get(scenario.url)
+        return time.perf_counter() - started, response.status_code
+
+    def run(self, scenario, requests, concurrency):
+        statuses = set()
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(requests):
+            latency, status = self.request(scenario)
+            latencies.append(latency)
+            statuses.add(status)
+        return latencies, time.perf_counter() - started, statuses
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class _NoRedirect(HTTPRedirectHandler):
+    # редиректы не отслеживаются, как и в тестовом клиенте
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class ServerDriver:
+    """Запросы по HTTP к WSGI-серверу, запущенному в этом же процессе.
+
+    Несколько потоков клиента позволяют оценить пропускную способность
+    под параллельной нагрузкой.
+    """
+
+    def __init__(self, user):
+        self.server = make_server(
+            '127.0.0.1', 0, WSGIHandler(),
+            server_class=_ThreadingWSGIServer, handler_class=_QuietHandler)
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}'
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.user = user
+        self.session = self._login()
+        self.opener = build_opener(_NoRedirect())
+
+    def _login(self):
+        client = Client()
+        client.force_login(self.user)
+        return client.cookies[settings.SESSION_COOKIE_NAME].value
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def request(self, scenario):
+        request = Request(self.base_url + scenario.url)
+        if scenario.login:
+            session = (
+                self._login() if scenario.name in RELOGIN else self.session)
+            request.add_header(
+                'Cookie', f'{settings.SESSION_COOKIE_NAME}={session}')
+        started = time.perf_counter()
+        try:
+            with self.opener.open(request) as response:
+                response.read()
+                status = response.status
+        except HTTPError as error:
+            error.read()
+            status = error.code
+        return time.perf_counter() - started, status
+
+    def run(self, scenario, requests, concurrency):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(
+                lambda _: self.request(scenario), range(requests)))
+        elapsed = time.perf_counter() - started
+        return ([latency for latency, _ in results], elapsed,
+                {status for _, status in results})
+
+
+class SlowDatabase:
+    """Добавляет задержку к каждому SQL-запросу во всех потоках.
+
+    Имитирует базу на другом сервере: с ней видно, сколько времени
+    представление ждёт базу и помогают ли параллельные запросы.
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def __call__(self, execute, sql, params, many, context):
+        time.sleep(self.latency)
+        return execute(sql, params, many, context)
+
+    def install(self, connection, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+    def __enter__(self):
+        connection_created.connect(self.install)
+        for existing in connections.all():
+            self.install(existing)
+        return self
+
+    def __exit__(self, *exc_info):
+        connection_created.disconnect(self.install)
+        for existing in connections.all():
+            if self in existing.execute_wrappers:
+                existing.execute_wrappers.remove(self)
+
+
+def count_queries(user, scenario):
+    """Число SQL-запросов на один ответ при пустом кэше.
+
+    Кэш очищается, чтобы число не зависело от того, что успели
+    закэшировать предыдущие запросы.
+    """
+    cache.clear()
+    client = Client()
+    if scenario.login:
+        client.force_login(user)
+    # QueryRecorder видит и запросы, выполненные в пуле core.parallel
+    with QueryRecorder() as recorder:
+        client.get(scenario.url)
+    return len(recorder.queries)
+
+
+def template_times(recorder, requests):
+    """Своё время самых дорогих шаблонов в мс на один ответ."""
+    return {
+        name: round(own / requests * 1000, 3)
+        for name, _, _, own in TemplateReport(
+            recorder.timings).by_template()[:TEMPLATES_TOP]
+    }
+
+
+def run(data, requests=50, warmup=5, concurrency=1, server=False,
+        only=None, progress=None):
+    """Прогоняет сценарии и возвращает результаты по каждому маршруту."""
+    user = data['user']
+    driver = ServerDriver(user) if server else ClientDriver(user)
+    results = {}
+    try:
+        for scenario in scenarios(data):
+            if only and scenario.name not in only:
+                continue
+            for _ in range(warmup):
+                driver.request(scenario)
+            # шаблоны замеряются только в этом потоке, то есть без сервера
+            recorder = TemplateRecorder()
+            with nullcontext() if server else recorder:
+                latencies, elapsed, statuses = driver.run(
+                    scenario, requests, concurrency)
+            result = summarize(latencies, elapsed)
+            if not server:
+                result['templates'] = template_times(recorder, requests)
+            result['queries'] = count_queries(user, scenario)
+            result['status'] = sorted(statuses)
+            result['url'] = scenario.url
+            results[scenario.name] = result
+            if progress is not None:
+                progress(scenario.name, result)
+    finally:
+        if server:
+            driver.close()
+    return results
@@ -0,0 +1,31 @@
+from django.test import TestCase
+
+from .. import dataset, report, runner
+
+
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = dataset.generate(dataset.Scale(
+            users=5, groups=2, posts=30, comments=20, follow_density=0.5))
+
+    def test_every_route_is_measured(self):
+        """Замеряются все маршруты posts и users без ошибок сервера."""
+        results = runner.run(self.data, requests=2, warmup=0)
+        for name in ('posts:index', 'posts:post_edit', 'posts:search',
+                     'users:password_reset_confirm'):
+            self.assertIn(name, results)
+        for name, result in results.items():
+            with self.subTest(route=name):
+                self.assertLess(max(result['status']), 500)
+                self.assertLessEqual(result['p50'], result['p99'])
+
+    def test_query_growth_is_a_regression(self):
+        """Рост числа SQL-запросов отмечается как регрессия."""
+        baseline = {'routes': {'posts:index': {'p95': 10.0, 'queries': 2}}}
+        results = {'posts:index': {'p95': 10.0, 'queries': 3}}
+        _, regressions = report.compare(results, baseline, threshold=10)
+        self.assertEqual(len(regressions), 1)
+        results['posts:index']['queries'] = 2
+        _, regressions = report.compare(results, baseline, threshold=10)
+        self.assertEqual(regressions, [])
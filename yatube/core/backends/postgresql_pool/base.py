@@ -0,0 +1,53 @@
+"""PostgreSQL с пулом соединений psycopg2 на процесс.
+
+Django 2.2 открывает соединение на каждый поток и закрывает его по
+CONN_MAX_AGE. Этот бэкенд вместо открытия берёт готовое соединение из
+ThreadedConnectionPool, а вместо закрытия возвращает его в пул, поэтому
+с CONN_MAX_AGE = 0 соединение занято только на время запроса, а число
+соединений с сервером не превышает POOL['MAX'] при любом числе потоков.
+Незавершённая транзакция откатывается при возврате в пул.
+"""
+import threading
+
+from django.db.backends.postgresql import base
+from psycopg2.pool import ThreadedConnectionPool
+
+_pools = {}
+_lock = threading.Lock()
+
+
+def get_pool(alias, conn_params, options):
+    with _lock:
+        connection_pool = _pools.get(alias)
+        if connection_pool is None:
+            connection_pool = _pools[alias] = ThreadedConnectionPool(
+                options.get('MIN', 1), options.get('MAX', 20), **conn_params)
+        return connection_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.get_connection_params(),
+                        self.settings_dict.get('POOL', {}))
+
+    def get_new_connection(self, conn_params):
+        connection = self.pool.getconn()
+        # соединение из пула приводится к состоянию только что открытого
+        connection.autocommit = False
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                # битое соединение пул закрывает, а не раздаёт снова
+                self.pool.putconn(
+                    self.connection, close=bool(self.connection.closed))
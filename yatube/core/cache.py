@@ -0,0 +1,189 @@
+"""Кэш в два уровня и вычисление значений с защитой от «давки» (stampede).
+
+TieredCache — бэкенд Django: короткоживущий кэш в памяти процесса (L1)
+поверх общего для всех воркеров кэша (L2), который задаётся отдельным
+алиасом в settings.CACHES. Запись идёт в оба уровня, чтение — сначала
+из L1. Значение в L1 живёт не дольше LOCAL_TIMEOUT секунд, поэтому
+после удаления ключа другие воркеры видят старое значение не дольше
+этого срока; LOCAL_TIMEOUT = 0 отключает L1.
+"""
+import math
+import os
+import random
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends import filebased
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+LOCK_SUFFIX = ':lock'
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = options.get('SHARED', 'shared')
+        self._shared = None
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        if not self.local_timeout:
+            self.local = DummyCache(location, {})
+            return
+        self.local = LocMemCache(f'tiered-{location}', {
+            'TIMEOUT': self.local_timeout,
+            'OPTIONS': {
+                'MAX_ENTRIES': options.get('LOCAL_MAX_ENTRIES', 1000),
+            },
+        })
+
+    @property
+    def shared(self):
+        if self._shared is None:
+            self._shared = caches[self.shared_alias]
+        return self._shared
+
+    def _local_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # add() служит блокировкой между воркерами, решает только L2
+        self.local.delete(key, version=version)
+        return self.shared.add(key, value, timeout, version=version)
+
+    def get(self, key, default=None, version=None):
+        sentinel = object()
+        value = self.local.get(key, sentinel, version=version)
+        if value is not sentinel:
+            return value
+        value = self.shared.get(key, sentinel, version=version)
+        if value is sentinel:
+            return default
+        self.local.set(key, value, self.local_timeout, version=version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self.local.set(key, value, self._local_timeout(timeout),
+                       version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.local.delete(key, version=version)
+        self.shared.delete(key, version=version)
+
+    def get_many(self, keys, version=None):
+        found = self.local.get_many(keys, version=version)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            shared = self.shared.get_many(missing, version=version)
+            self.local.set_many(shared, self.local_timeout, version=version)
+            found.update(shared)
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        self.local.set_many(data, self._local_timeout(timeout),
+                            version=version)
+        return failed
+
+    def delete_many(self, keys, version=None):
+        self.local.delete_many(keys, version=version)
+        self.shared.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        return (self.local.has_key(key, version=version)
+                or self.shared.has_key(key, version=version))
+
+    def incr(self, key, delta=1, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.incr(key, delta, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        # close_caches() перебирает кэши потока, и создавать общий кэш
+        # посреди перебора нельзя: закрываем, только если он уже открыт
+        if self._shared is not None:
+            self._shared.close(**kwargs)
+
+
+class FileBasedCache(filebased.FileBasedCache):
+    """Файловый кэш, у которого add() можно использовать как блокировку.
+
+    В Django add() файлового кэша — проверка has_key() и затем set(),
+    и два воркера могут оба получить True. Здесь обе операции идут под
+    fcntl.flock на общем файле в каталоге кэша. На системах без fcntl
+    (Windows) add() остаётся неатомарным.
+    """
+
+    LOCK_NAME = 'add.lock'
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        self.lock_path = os.path.join(os.path.abspath(dir), self.LOCK_NAME)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if fcntl is None:
+            return super().add(key, value, timeout, version)
+        os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+        with open(self.lock_path, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                return super().add(key, value, timeout, version)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def get_or_set(key, compute, timeout, beta=1.0, lock_timeout=10,
+               alias='default'):
+    """Возвращает значение из кэша, вычисляя его не более чем в одном месте.
+
+    Рядом со значением хранятся время его вычисления и момент истечения.
+    Незадолго до истечения значение с растущей вероятностью пересчитывается
+    заранее (probabilistic early expiration), а блокировка через
+    cache.add() не даёт нескольким воркерам пересчитывать его разом:
+    остальные тем временем отдают прежнее значение. Блокировка надёжна,
+    только если add() общего кэша атомарен: так у Redis, memcached,
+    LocMemCache (в пределах процесса) и FileBasedCache из этого модуля.
+    """
+    cache = caches[alias]
+    envelope = cache.get(key)
+    if envelope is not None:
+        value, delta, expires = envelope
+        jitter = -delta * beta * math.log(1.0 - random.random())
+        if time.time() + jitter < expires:
+            return value
+    lock_key = key + LOCK_SUFFIX
+    locked = cache.add(lock_key, True, lock_timeout)
+    if not locked:
+        if envelope is not None:
+            return envelope[0]
+        deadline = time.time() + lock_timeout
+        while time.time() < deadline:
+            time.sleep(0.05)
+            envelope = cache.get(key)
+            if envelope is not None:
+                return envelope[0]
+    try:
+        started = time.time()
+        value = compute()
+        finished = time.time()
+        cache.set(key, (value, finished - started, finished + timeout),
+                  timeout)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return value
@@ -0,0 +1,19 @@
+"""Настройка соединений с базой при их открытии.
+
+SQLite по умолчанию пишет журнал отката, и запись блокирует чтение.
+В режиме WAL читатели не ждут пишущего (например, post_create), а
+synchronous=NORMAL, mmap и ожидание блокировки снимают остальные
+задержки. Прагмы задаются в SQLITE_PRAGMAS и выполняются на
+DB-API-соединении напрямую, чтобы не попадать в учёт SQL-запросов.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,159 @@
+import logging
+import mimetypes
+import os
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from . import staticfiles
+from .queries import QueryBudgetExceeded, QueryRecorder, QueryReport
+from .rendering import TemplateRecorder, TemplateReport
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetMiddleware:
+    """Считает SQL-запросы запроса и сверяет их с бюджетом представления.
+
+    Бюджет задаётся декоратором query_budget. Превышение бюджета и
+    повторяющиеся запросы пишутся в журнал, а при QUERY_BUDGET_RAISE
+    приводят к исключению. При QUERY_BUDGET_HEADERS число запросов
+    добавляется в заголовки ответа.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.query_budget = None
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        report = QueryReport(
+            recorder.queries,
+            budget=request.query_budget,
+            repeat_limit=settings.QUERY_BUDGET_REPEAT_LIMIT,
+        )
+        response.query_report = report
+        if settings.QUERY_BUDGET_HEADERS:
+            response['X-Query-Count'] = report.count
+            response['X-Query-Time'] = f'{report.duration * 1000:.1f}ms'
+            if report.budget is not None:
+                response['X-Query-Budget'] = report.budget
+        problems = report.problems()
+        if problems:
+            message = '{}: {}'.format(request.path, '; '.join(problems))
+            if settings.QUERY_BUDGET_RAISE:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = getattr(view_func, 'query_budget', None)
+
+
+class TemplateProfilerMiddleware:
+    """Замеряет отрисовку шаблонов запроса при TEMPLATE_PROFILING.
+
+    Самые дорогие по своему времени шаблоны уходят в заголовок
+    Server-Timing (его показывают инструменты разработчика браузера)
+    и в журнал.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.TEMPLATE_PROFILING:
+            return self.get_response(request)
+        with TemplateRecorder() as recorder:
+            response = self.get_response(request)
+        report = TemplateReport(recorder.timings)
+        response.template_report = report
+        if report.timings:
+            response['Server-Timing'] = report.server_timing(
+                settings.TEMPLATE_PROFILING_TOP)
+            logger.debug('%s: шаблоны %.1f ms: %s', request.path,
+                         report.duration * 1000, '; '.join(
+                             f'{name} x{count} {own * 1000:.1f} ms'
+                             for name, count, _, own in report.by_template()))
+        return response
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме запрещённых через q=0."""
+    encodings = set()
+    for item in header.split(','):
+        encoding, _, params = item.partition(';')
+        name, _, value = params.partition('=')
+        try:
+            quality = float(value) if name.strip() == 'q' else 1.0
+        except ValueError:
+            quality = 0.0
+        if encoding.strip() and quality > 0:
+            encodings.add(encoding.strip().lower())
+    return encodings
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную collectstatic статику из STATIC_ROOT.
+
+    Из сжатых копий (.br, .gz) выбирается та, что принимает браузер.
+    Файлы с хешем в имени кэшируются бессрочно, остальные —
+    STATIC_MAX_AGE секунд. Файла нет в STATIC_ROOT — запрос идёт дальше.
+    При DEBUG статику отдаёт runserver прямо из исходников.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = None
+        if (request.method in ('GET', 'HEAD') and settings.STATIC_ROOT
+                and not settings.DEBUG):
+            response = self.serve(request)
+        if response is None:
+            response = self.get_response(request)
+        return response
+
+    def serve(self, request):
+        prefix = settings.STATIC_URL
+        if not request.path_info.startswith(prefix):
+            return None
+        name = request.path_info[len(prefix):]
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        encoding, served = None, path
+        for candidate, extension in staticfiles.ENCODINGS:
+            if candidate in accepted and os.path.isfile(path + extension):
+                encoding, served = candidate, path + extension
+                break
+        stat = os.stat(served)
+        if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                                  stat.st_mtime, stat.st_size):
+            response = HttpResponseNotModified()
+        else:
+            content_type = mimetypes.guess_type(path)[0]
+            response = FileResponse(
+                open(served, 'rb'),
+                content_type=content_type or 'application/octet-stream')
+            if encoding is not None:
+                response['Content-Encoding'] = encoding
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        patch_vary_headers(response, ['Accept-Encoding'])
+        if staticfiles.is_immutable(name):
+            response['Cache-Control'] = 'public, max-age=31536000, immutable'
+        else:
+            response['Cache-Control'] = (
+                f'public, max-age={settings.STATIC_MAX_AGE}')
+        return response
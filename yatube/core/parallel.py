@@ -0,0 +1,83 @@
+"""Параллельное выполнение независимых обращений к базе в представлении.
+
+Django 2.2 не поддерживает асинхронные представления, поэтому
+независимые запросы (объект автора, проверка подписки, страница ленты)
+выполняются в общем пуле потоков, а представление ждёт все результаты.
+Пока база отвечает, поток запроса не простаивает впустую, и задержка
+ответа определяется самым медленным запросом, а не их суммой.
+
+У каждого потока пула своё соединение с базой; как и после запроса,
+оно закрывается по правилам CONN_MAX_AGE. Обёртки execute_wrapper
+вызывающего потока (например, учёт запросов QueryBudgetMiddleware)
+действуют и в потоке пула. При LOOKUP_WORKERS = 0 всё выполняется по
+очереди в потоке запроса: так работают тесты, у которых данные видны
+только внутри транзакции теста.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections, connections
+from django.dispatch import receiver
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.LOOKUP_WORKERS,
+                thread_name_prefix='lookup')
+        return _executor
+
+
+def _wrappers():
+    return {
+        connection.alias: list(connection.execute_wrappers)
+        for connection in connections.all()
+    }
+
+
+def _run(call, wrappers):
+    close_old_connections()
+    try:
+        with ExitStack() as stack:
+            for alias, alias_wrappers in wrappers.items():
+                connection = connections[alias]
+                for wrapper in alias_wrappers:
+                    if wrapper not in connection.execute_wrappers:
+                        stack.enter_context(
+                            connection.execute_wrapper(wrapper))
+            return call()
+    finally:
+        close_old_connections()
+
+
+def gather(*calls):
+    """Вызывает функции без аргументов и возвращает их результаты.
+
+    Первая функция выполняется в текущем потоке, остальные — в пуле.
+    Исключение любой из них пробрасывается вызывающему.
+    """
+    if settings.LOOKUP_WORKERS < 1 or len(calls) < 2:
+        return [call() for call in calls]
+    wrappers = _wrappers()
+    executor = _get_executor()
+    futures = [executor.submit(_run, call, wrappers) for call in calls[1:]]
+    first = calls[0]()
+    return [first] + [future.result() for future in futures]
+
+
+@receiver(setting_changed)
+def reset_executor(setting, **kwargs):
+    global _executor
+    if setting == 'LOOKUP_WORKERS':
+        with _executor_lock:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = None
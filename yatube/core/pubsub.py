@@ -0,0 +1,148 @@
+"""Публикация сообщений в каналы и подписка на них (pub/sub).
+
+Брокер задаётся настройкой PUBSUB. LocalBroker доставляет сообщения
+подписчикам внутри одного процесса; когда воркеров несколько,
+RedisBroker пересылает их через PUBLISH/SUBSCRIBE Redis (нужен пакет
+redis). Сообщение — словарь, который можно сериализовать в JSON.
+"""
+import json
+import queue
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+class LocalSubscription:
+    def __init__(self, broker, channels, max_pending):
+        self.broker = broker
+        self.channels = list(channels)
+        self.queue = queue.Queue(max_pending)
+
+    def get(self, timeout=None):
+        """Следующее сообщение (канал, данные) или None по таймауту."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class LocalBroker:
+    """Доставка в пределах процесса через очереди подписчиков.
+
+    У подписчика в очереди не больше max_pending сообщений: если он не
+    успевает их забирать, новые сообщения для него отбрасываются.
+    """
+
+    def __init__(self, max_pending=100):
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        self.subscriptions = defaultdict(set)
+
+    def publish(self, channel, message):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.queue.put_nowait((channel, message))
+            except queue.Full:
+                pass
+
+    def subscribe(self, channels):
+        subscription = LocalSubscription(self, channels, self.max_pending)
+        with self.lock:
+            for channel in subscription.channels:
+                self.subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            for channel in subscription.channels:
+                subscribers = self.subscriptions.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscriptions[channel]
+
+
+class RedisSubscription:
+    def __init__(self, pubsub, channels):
+        self.pubsub = pubsub
+        if channels:
+            self.pubsub.subscribe(*channels)
+
+    def get(self, timeout=None):
+        message = self.pubsub.get_message(timeout=timeout or 0)
+        if message is None:
+            return None
+        return message['channel'].decode(), json.loads(message['data'])
+
+    def close(self):
+        self.pubsub.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class RedisBroker:
+    """Доставка между процессами через Redis."""
+
+    def __init__(self, url='redis://127.0.0.1:6379/0'):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured('Для RedisBroker нужен пакет redis')
+        self.client = redis.Redis.from_url(url)
+
+    def publish(self, channel, message):
+        self.client.publish(channel, json.dumps(message))
+
+    def subscribe(self, channels):
+        return RedisSubscription(
+            self.client.pubsub(ignore_subscribe_messages=True), channels)
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            config = settings.PUBSUB
+            _broker = import_string(config['BACKEND'])(
+                **config.get('OPTIONS', {}))
+        return _broker
+
+
+def publish(channel, message):
+    get_broker().publish(channel, message)
+
+
+def subscribe(channels):
+    return get_broker().subscribe(channels)
+
+
+@receiver(setting_changed)
+def reset_broker(setting, **kwargs):
+    global _broker
+    if setting == 'PUBSUB':
+        with _broker_lock:
+            _broker = None
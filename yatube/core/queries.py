@@ -0,0 +1,98 @@
+"""Учёт SQL-запросов запроса и поиск повторяющихся запросов (N+1).
+
+QueryRecorder подключается ко всем соединениям через execute_wrapper и
+записывает каждый запрос. Запросы приводятся к «форме»: параметры и
+списки IN (...) схлопываются, поэтому одинаковые по форме запросы
+в цикле по объектам видны как один повторяющийся.
+"""
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.db import connections
+
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление выполнило больше запросов, чем ему разрешено."""
+
+
+def query_budget(queries):
+    """Объявляет, сколько SQL-запросов может выполнить представление.
+
+    В бюджет входят все запросы обработки, в том числе чтение сессии
+    и пользователя.
+    """
+    def decorator(view):
+        view.query_budget = queries
+        return view
+    return decorator
+
+
+def shape(sql):
+    return LITERAL.sub('?', IN_LIST.sub('IN (...)', sql))
+
+
+class QueryReport:
+    def __init__(self, queries, budget=None, repeat_limit=None):
+        self.queries = queries
+        self.budget = budget
+        self.repeat_limit = repeat_limit
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        return sum(duration for _, duration in self.queries)
+
+    @property
+    def over_budget(self):
+        return self.budget is not None and self.count > self.budget
+
+    def repeated(self):
+        """Формы запросов, повторённые больше repeat_limit раз."""
+        if not self.repeat_limit:
+            return {}
+        counts = Counter(shape(sql) for sql, _ in self.queries)
+        return {
+            sql: count for sql, count in counts.most_common()
+            if count > self.repeat_limit
+        }
+
+    def problems(self):
+        problems = []
+        if self.over_budget:
+            problems.append(
+                f'{self.count} SQL-запросов при бюджете {self.budget}')
+        for sql, count in self.repeated().items():
+            problems.append(f'N+1: {count} раз {sql}')
+        return problems
+
+
+class QueryRecorder:
+    """Контекстный менеджер, записывающий запросы всех соединений."""
+
+    def __init__(self):
+        self.queries = []
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
@@ -0,0 +1,96 @@
+"""Учёт времени отрисовки шаблонов, в том числе включённых через include.
+
+TemplateRecorder записывает, сколько заняла отрисовка каждого шаблона
+в текущем потоке: всего и без вложенных шаблонов (своё время). Сумма
+своего времени всех шаблонов — время отрисовки страницы, поэтому по
+нему видно, какие фрагменты из includes/ обходятся дороже всего.
+Template._render оборачивается при первом включении записи; пока
+записи в потоке нет, обёртка сразу вызывает исходный метод.
+"""
+import threading
+import time
+from collections import defaultdict
+
+from django.template.base import Template
+
+_local = threading.local()
+_original_render = None
+
+
+def _profiled_render(self, context):
+    recorders = getattr(_local, 'recorders', None)
+    if not recorders:
+        return _original_render(self, context)
+    # время вложенных шаблонов копится в ячейке родителя на стеке
+    _local.stack.append(0.0)
+    started = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        total = time.perf_counter() - started
+        nested = _local.stack.pop()
+        if _local.stack:
+            _local.stack[-1] += total
+        timing = (self.name or '<строка>', total, total - nested)
+        for recorder in recorders:
+            recorder.timings.append(timing)
+
+
+def install():
+    """Оборачивает Template._render, если он ещё не обёрнут.
+
+    Проверяется сам метод, а не флаг: тестовое окружение Django
+    подменяет и восстанавливает его.
+    """
+    global _original_render
+    if Template._render is not _profiled_render:
+        _original_render = Template._render
+        Template._render = _profiled_render
+
+
+class TemplateReport:
+    def __init__(self, timings):
+        self.timings = timings
+
+    @property
+    def duration(self):
+        return sum(own for _, _, own in self.timings)
+
+    def by_template(self):
+        """(имя, отрисовок, всего, своё время) по убыванию своего времени."""
+        totals = defaultdict(lambda: [0, 0.0, 0.0])
+        for name, total, own in self.timings:
+            entry = totals[name]
+            entry[0] += 1
+            entry[1] += total
+            entry[2] += own
+        return sorted(
+            ((name, *entry) for name, entry in totals.items()),
+            key=lambda row: row[3], reverse=True)
+
+    def server_timing(self, limit):
+        """Значение заголовка Server-Timing: самые дорогие шаблоны."""
+        entries = [f'tpl;desc="templates";dur={self.duration * 1000:.1f}']
+        for number, (name, count, _, own) in enumerate(
+                self.by_template()[:limit], 1):
+            entries.append(
+                f'tpl{number};desc="{name} x{count}";dur={own * 1000:.1f}')
+        return ', '.join(entries)
+
+
+class TemplateRecorder:
+    """Контекстный менеджер, записывающий отрисовки шаблонов в потоке."""
+
+    def __init__(self):
+        self.timings = []
+
+    def __enter__(self):
+        install()
+        if not getattr(_local, 'recorders', None):
+            _local.recorders = []
+            _local.stack = []
+        _local.recorders.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _local.recorders.remove(self)
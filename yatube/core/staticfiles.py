@@ -0,0 +1,86 @@
+"""Статика с хешами в именах, сжатием и долгим кэшированием.
+
+collectstatic складывает файлы в STATIC_ROOT под именами с хешем
+содержимого (css/base.3f2a….css), записывает manifest и рядом с каждым
+текстовым файлом кладёт сжатые копии .gz и, если установлен пакет
+brotli, .br. StaticFilesMiddleware отдаёт эти файлы из приложения:
+сжатую копию по Accept-Encoding, файлы с хешем — с бессрочным
+кэшированием, остальные — с коротким.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import (ManifestStaticFilesStorage,
+                                                staticfiles_storage)
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = {
+    '.css', '.js', '.map', '.svg', '.json', '.txt', '.xml', '.html', '.ico',
+}
+# (кодировка в Accept-Encoding, расширение копии) в порядке предпочтения
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+# сжатая копия, которая экономит меньше, не сохраняется
+MIN_SAVING = 0.05
+
+
+def _compressors():
+    if brotli is not None:
+        yield '.br', brotli.compress
+    yield '.gz', lambda data: gzip.compress(data, 9, mtime=0)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # файл, которого нет в manifest, хешируется при обращении
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # файла нет и среди собранной статики: ссылка остаётся
+            # на исходное имя, а не роняет страницу
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        # файл может пройти обработку несколько раз, сжимаем итог один раз
+        hashed = {}
+        processed = super().post_process(paths, dry_run, **options)
+        for name, hashed_name, processed_file in processed:
+            yield name, hashed_name, processed_file
+            if hashed_name and not isinstance(processed_file, Exception):
+                hashed[name] = hashed_name
+        self._immutable_names = None
+        if not dry_run:
+            for name, hashed_name in hashed.items():
+                self.compress(name)
+                self.compress(hashed_name)
+
+    def compress(self, name):
+        """Сохраняет сжатые копии файла рядом с ним."""
+        if os.path.splitext(name)[1].lower() not in COMPRESSIBLE:
+            return
+        with self.open(name) as original:
+            data = original.read()
+        for extension, compress in _compressors():
+            compressed = compress(data)
+            if len(compressed) > len(data) * (1 - MIN_SAVING):
+                continue
+            if self.exists(name + extension):
+                self.delete(name + extension)
+            self._save(name + extension, ContentFile(compressed))
+
+    def is_immutable(self, name):
+        """Имя с хешем содержимого: файл под ним никогда не меняется."""
+        if getattr(self, '_immutable_names', None) is None:
+            self._immutable_names = set(self.hashed_files.values())
+        return name in self._immutable_names
+
+
+def is_immutable(name):
+    check = getattr(staticfiles_storage, 'is_immutable', None)
+    return check is not None and check(name)
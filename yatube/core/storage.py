@@ -0,0 +1,66 @@
+"""Хранилище файлов с адресацией по содержимому.
+
+Файл сохраняется под SHA-256 своего содержимого: posts/ab/abcd…ef.webp.
+Хеш считается на лету, пока загрузка пишется во временный файл рядом
+с итоговым, поэтому файл читается один раз. Одинаковые загрузки
+хранятся в одном экземпляре, а имя файла никогда не меняет содержимое,
+так что его можно отдавать с бессрочным кэшированием.
+"""
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+HASHED_NAME = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$')
+
+
+def is_hashed(name):
+    return HASHED_NAME.search(name) is not None
+
+
+@deconstructible
+class HashedMediaStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # итоговое имя определяет содержимое, а не имя загрузки
+        return name
+
+    def hashed_name(self, name, digest):
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        return os.path.join(
+            directory, digest[:2], digest + extension).replace('\\', '/')
+
+    def _file_mode(self):
+        if self.file_permissions_mode is not None:
+            return self.file_permissions_mode
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+    def _save(self, name, content):
+        os.makedirs(self.location, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=self.location, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+            name = self.hashed_name(name, digest.hexdigest())
+            full_path = self.path(name)
+            if not os.path.exists(full_path):
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                os.chmod(temp_path, self._file_mode())
+                os.replace(temp_path, full_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return name
+
+
+hashed_storage = HashedMediaStorage()
@@ -0,0 +1,35 @@
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+_contents = {}
+
+
+def _read(path):
+    # после collectstatic файл берётся из STATIC_ROOT, до него — из исходников
+    try:
+        with staticfiles_storage.open(path) as static_file:
+            return static_file.read().decode()
+    except (OSError, ValueError, ImproperlyConfigured):
+        found = finders.find(path)
+        if found is None:
+            raise
+        with open(found, encoding='utf-8') as static_file:
+            return static_file.read()
+
+
+@register.simple_tag
+def inline_static(path):
+    """Содержимое небольшого файла статики для вставки прямо в страницу.
+
+    Файл читается один раз на процесс, при DEBUG — на каждый запрос,
+    чтобы правки были видны сразу.
+    """
+    if settings.DEBUG or path not in _contents:
+        _contents[path] = _read(path)
+    return mark_safe(_contents[path])
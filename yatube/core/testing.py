@@ -0,0 +1,12 @@
+class QueryBudgetTestMixin:
+    """Проверки отчёта QueryBudgetMiddleware для тестов представлений."""
+
+    def assertWithinQueryBudget(self, response):
+        report = getattr(response, 'query_report', None)
+        if report is None:
+            self.fail('Ответ не прошёл через QueryBudgetMiddleware')
+        if report.budget is None:
+            self.fail('У представления не объявлен бюджет запросов')
+        problems = report.problems()
+        if problems:
+            self.fail('\n'.join(problems))
@@ -0,0 +1,97 @@
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from ..cache import LOCK_SUFFIX, FileBasedCache, get_or_set
+
+TIERED_CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.TieredCache',
+        'OPTIONS': {'SHARED': 'shared', 'LOCAL_TIMEOUT': 5},
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tiered-tests',
+    },
+}
+
+
+@override_settings(CACHES=TIERED_CACHES)
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = caches['default']
+        self.cache.clear()
+
+    def test_local_tier_serves_reads(self):
+        """Прочитанное значение остаётся в памяти процесса."""
+        caches['shared'].set('key', 'value')
+        self.assertEqual(self.cache.get('key'), 'value')
+        caches['shared'].delete('key')
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_add_is_decided_by_shared_tier(self):
+        """add() работает как блокировка в общем кэше."""
+        self.assertTrue(self.cache.add('lock', 1))
+        self.assertFalse(self.cache.add('lock', 1))
+        self.assertEqual(caches['shared'].get('lock'), 1)
+
+
+@override_settings(CACHES=TIERED_CACHES)
+class GetOrSetTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = caches['default']
+        self.cache.clear()
+        self.compute = mock.Mock(side_effect=range(100))
+
+    def test_value_is_computed_once(self):
+        """Пока значение свежее, функция не вызывается повторно."""
+        self.assertEqual(get_or_set('key', self.compute, 60), 0)
+        self.assertEqual(get_or_set('key', self.compute, 60), 0)
+        self.assertEqual(self.compute.call_count, 1)
+
+    def test_locked_key_returns_stale_value(self):
+        """Пока другой воркер пересчитывает значение, отдаётся старое."""
+        self.cache.set('key', ('stale', 1.0, time.time() - 1), 60)
+        self.cache.add('key' + LOCK_SUFFIX, True)
+        self.assertEqual(get_or_set('key', self.compute, 60), 'stale')
+        self.compute.assert_not_called()
+
+    def test_expiring_value_is_recomputed_early(self):
+        """Значение, дорогое в вычислении, пересчитывается до истечения."""
+        self.cache.set('key', ('old', 1000.0, time.time() + 1), 60)
+        with mock.patch('core.cache.random.random', return_value=0.5):
+            self.assertEqual(get_or_set('key', self.compute, 60), 0)
+
+
+class FileBasedCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.cache = FileBasedCache(directory, {})
+
+    def test_add_is_a_lock_between_threads(self):
+        """Из одновременных add() одного ключа удаётся ровно один."""
+        barrier = threading.Barrier(8)
+
+        def add(number):
+            barrier.wait()
+            return self.cache.add('lock', number)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(add, range(8)))
+        self.assertEqual(results.count(True), 1)
+        self.assertEqual(self.cache.get('lock'), results.index(True))
+
+    def test_expired_key_can_be_added(self):
+        self.assertTrue(self.cache.add('lock', 1, timeout=-1))
+        self.assertTrue(self.cache.add('lock', 2))
+        self.assertFalse(self.cache.add('lock', 3))
+        self.assertEqual(self.cache.get('lock'), 2)
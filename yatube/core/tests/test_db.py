@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, override_settings
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 100,
+}
+
+
+@override_settings(SQLITE_PRAGMAS=PRAGMAS)
+class SqlitePragmaTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.settings_dict = {
+            **connection.settings_dict,
+            'NAME': os.path.join(directory, 'db.sqlite3'),
+        }
+
+    def connect(self):
+        wrapper = DatabaseWrapper(self.settings_dict, alias='pragmas')
+        wrapper.ensure_connection()
+        self.addCleanup(wrapper.close)
+        return wrapper.connection
+
+    def test_pragmas_applied(self):
+        database = self.connect()
+        self.assertEqual(
+            database.execute('PRAGMA journal_mode').fetchone(), ('wal',))
+        self.assertEqual(
+            database.execute('PRAGMA synchronous').fetchone(), (1,))
+        self.assertEqual(
+            database.execute('PRAGMA busy_timeout').fetchone(), (100,))
+
+    def test_reader_does_not_wait_for_writer(self):
+        writer = self.connect()
+        writer.execute('CREATE TABLE post (text TEXT)')
+        writer.execute("INSERT INTO post VALUES ('первый')")
+        writer.commit()
+        writer.execute('BEGIN EXCLUSIVE')
+        writer.execute("INSERT INTO post VALUES ('второй')")
+        reader = self.connect()
+        # без WAL чтение ждало бы конца записи и упало по busy_timeout
+        self.assertEqual(
+            reader.execute('SELECT text FROM post').fetchall(),
+            [('первый',)])
+        writer.rollback()
@@ -0,0 +1,50 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.test import (SimpleTestCase, TransactionTestCase,
+                         override_settings)
+
+from core.parallel import gather
+from core.queries import QueryRecorder
+
+User = get_user_model()
+
+
+def thread_name():
+    return threading.current_thread().name
+
+
+@override_settings(LOOKUP_WORKERS=2)
+class GatherTests(SimpleTestCase):
+    def test_results_in_order(self):
+        first, second, third = gather(
+            thread_name, thread_name, lambda: 3)
+        self.assertEqual(first, threading.current_thread().name)
+        self.assertTrue(second.startswith('lookup'))
+        self.assertEqual(third, 3)
+
+    def test_exception_is_raised_to_caller(self):
+        def fail():
+            raise LookupError('нет')
+
+        with self.assertRaises(LookupError):
+            gather(lambda: 1, fail)
+
+    @override_settings(LOOKUP_WORKERS=0)
+    def test_without_pool(self):
+        names = gather(thread_name, thread_name)
+        self.assertEqual(set(names), {threading.current_thread().name})
+
+
+@override_settings(LOOKUP_WORKERS=2)
+class GatherQueriesTests(TransactionTestCase):
+    def test_queries_in_pool_are_recorded(self):
+        """Запросы из потоков пула видны QueryRecorder запроса."""
+        User.objects.create_user(username='author')
+        with QueryRecorder() as recorder:
+            first, second = gather(
+                lambda: User.objects.count(),
+                lambda: User.objects.filter(username='author').exists(),
+            )
+        self.assertEqual((first, second), (1, True))
+        self.assertEqual(len(recorder.queries), 2)
@@ -0,0 +1,36 @@
+from django.test import SimpleTestCase, override_settings
+
+from core import pubsub
+from core.pubsub import LocalBroker
+
+
+class LocalBrokerTests(SimpleTestCase):
+    def test_delivers_to_channel_subscribers(self):
+        broker = LocalBroker()
+        with broker.subscribe(['a', 'b']) as first, \
+                broker.subscribe(['b']) as second:
+            broker.publish('a', {'id': 1})
+            broker.publish('b', {'id': 2})
+            broker.publish('c', {'id': 3})
+            self.assertEqual(first.get(0), ('a', {'id': 1}))
+            self.assertEqual(first.get(0), ('b', {'id': 2}))
+            self.assertEqual(second.get(0), ('b', {'id': 2}))
+            self.assertIsNone(first.get(0))
+            self.assertIsNone(second.get(0))
+        self.assertEqual(broker.subscriptions, {})
+
+    def test_slow_subscriber_drops_messages(self):
+        broker = LocalBroker(max_pending=2)
+        with broker.subscribe(['a']) as subscription:
+            for pk in range(5):
+                broker.publish('a', {'id': pk})
+            self.assertEqual(subscription.get(0), ('a', {'id': 0}))
+            self.assertEqual(subscription.get(0), ('a', {'id': 1}))
+            self.assertIsNone(subscription.get(0))
+
+    @override_settings(PUBSUB={
+        'BACKEND': 'core.pubsub.LocalBroker',
+        'OPTIONS': {'max_pending': 7},
+    })
+    def test_broker_from_settings(self):
+        self.assertEqual(pubsub.get_broker().max_pending, 7)
@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test import override_settings
+
+from ..middleware import QueryBudgetMiddleware
+from ..queries import QueryBudgetExceeded, QueryRecorder, QueryReport, shape
+
+User = get_user_model()
+
+
+class QueryShapeTests(SimpleTestCase):
+    def test_shape_collapses_parameters(self):
+        """Запросы, различающиеся только параметрами, имеют одну форму."""
+        self.assertEqual(
+            shape('SELECT * FROM t WHERE id IN (%s, %s, %s) LIMIT 21'),
+            shape('SELECT * FROM t WHERE id IN (%s) LIMIT 5'),
+        )
+
+    def test_repeated_shapes_are_reported(self):
+        """Повтор одного запроса больше лимита помечается как N+1."""
+        queries = [('SELECT * FROM t WHERE id = %s', 0.001)] * 4
+        report = QueryReport(queries, budget=10, repeat_limit=3)
+        self.assertEqual(len(report.problems()), 1)
+        report.repeat_limit = 4
+        self.assertEqual(report.problems(), [])
+
+
+@override_settings(QUERY_BUDGET_HEADERS=True, QUERY_BUDGET_REPEAT_LIMIT=3)
+class QueryBudgetMiddlewareTests(TestCase):
+    def make_view(self, budget, lookups):
+        def view(request):
+            for i in range(lookups):
+                User.objects.filter(pk=i).exists()
+            return HttpResponse()
+        view.query_budget = budget
+        return view
+
+    def call(self, view):
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = QueryBudgetMiddleware(get_response)
+        return middleware(RequestFactory().get('/'))
+
+    def test_recorder_counts_queries(self):
+        with QueryRecorder() as recorder:
+            User.objects.count()
+        self.assertEqual(len(recorder.queries), 1)
+
+    def test_headers_report_count_and_budget(self):
+        response = self.call(self.make_view(budget=5, lookups=2))
+        self.assertEqual(response['X-Query-Count'], '2')
+        self.assertEqual(response['X-Query-Budget'], '5')
+
+    @override_settings(QUERY_BUDGET_RAISE=True)
+    def test_raises_over_budget(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.call(self.make_view(budget=1, lookups=2))
+
+    @override_settings(QUERY_BUDGET_RAISE=True)
+    def test_raises_on_n_plus_one(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.call(self.make_view(budget=10, lookups=4))
@@ -0,0 +1,59 @@
+from django.template import Context, Engine
+from django.test import Client, SimpleTestCase, override_settings
+
+from ..rendering import TemplateRecorder, TemplateReport
+
+TEMPLATES = {
+    'page.html': '{% for i in items %}{% include "item.html" %}{% endfor %}',
+    'item.html': '<p>{{ i }}</p>',
+}
+
+
+class TemplateRecorderTests(SimpleTestCase):
+    def setUp(self):
+        engine = Engine(loaders=[
+            ('django.template.loaders.locmem.Loader', TEMPLATES)])
+        self.template = engine.get_template('page.html')
+
+    def test_includes_are_recorded(self):
+        with TemplateRecorder() as recorder:
+            self.template.render(Context({'items': range(3)}))
+        rows = {name: (count, total, own) for name, count, total, own
+                in TemplateReport(recorder.timings).by_template()}
+        self.assertEqual(rows['page.html'][0], 1)
+        self.assertEqual(rows['item.html'][0], 3)
+        # в общее время страницы входят включённые шаблоны
+        self.assertGreaterEqual(rows['page.html'][1], rows['item.html'][1])
+        self.assertAlmostEqual(
+            TemplateReport(recorder.timings).duration, rows['page.html'][1])
+
+    def test_nothing_recorded_outside(self):
+        recorder = TemplateRecorder()
+        self.template.render(Context({'items': range(3)}))
+        self.assertEqual(recorder.timings, [])
+
+    def test_server_timing(self):
+        report = TemplateReport([
+            ('page.html', 0.004, 0.001),
+            ('item.html', 0.001, 0.001),
+            ('item.html', 0.002, 0.002),
+        ])
+        self.assertEqual(
+            report.server_timing(1),
+            'tpl;desc="templates";dur=4.0, '
+            'tpl1;desc="item.html x2";dur=3.0',
+        )
+
+
+class TemplateProfilerMiddlewareTests(SimpleTestCase):
+    @override_settings(TEMPLATE_PROFILING=True)
+    def test_header(self):
+        response = Client().get('/about/author/')
+        self.assertIn('includes/header.html', response['Server-Timing'])
+        self.assertIn('about/author.html', [
+            name for name, *_ in response.template_report.by_template()])
+
+    @override_settings(TEMPLATE_PROFILING=False)
+    def test_disabled(self):
+        response = Client().get('/about/author/')
+        self.assertNotIn('Server-Timing', response)
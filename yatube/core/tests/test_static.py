@@ -0,0 +1,81 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, override_settings
+
+from ..middleware import accepted_encodings
+from ..templatetags.inline_static import inline_static
+
+STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(
+    STATIC_ROOT=STATIC_ROOT,
+    STATICFILES_STORAGE=(
+        'core.staticfiles.CompressedManifestStaticFilesStorage'),
+)
+class StaticPipelineTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.hashed = staticfiles_storage.stored_name('js/events.js')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_hashed_names_and_compressed_copies(self):
+        self.assertNotEqual(self.hashed, 'js/events.js')
+        path = os.path.join(STATIC_ROOT, self.hashed)
+        with open(path, 'rb') as original, open(path + '.gz', 'rb') as copy:
+            self.assertEqual(gzip.decompress(copy.read()), original.read())
+
+    def test_hashed_file_is_immutable(self):
+        response = self.client.get(
+            settings.STATIC_URL + self.hashed, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('javascript', response['Content-Type'])
+
+    def test_plain_name_is_revalidated(self):
+        url = settings.STATIC_URL + 'js/events.js'
+        response = self.client.get(url)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(response['Cache-Control'],
+                         f'public, max-age={settings.STATIC_MAX_AGE}')
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_file_falls_through(self):
+        response = self.client.get(settings.STATIC_URL + 'js/missing.js')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(settings.STATIC_URL + '../manage.py')
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_inlines_critical_css(self):
+        """Стили первого экрана в странице; нет файла — ссылка без хеша."""
+        response = self.client.get('/about/author/')
+        self.assertContains(response, '/static/css/bootstrap.min.css')
+        self.assertContains(response, '<style>/* Стили первого экрана')
+
+
+class InlineStaticTests(SimpleTestCase):
+    def test_inline(self):
+        self.assertIn('.navbar{', inline_static('css/critical.css'))
+
+    def test_accepted_encodings(self):
+        self.assertEqual(accepted_encodings('gzip, deflate, br'),
+                         {'gzip', 'deflate', 'br'})
+        self.assertEqual(accepted_encodings('br;q=0, gzip;q=0.5'), {'gzip'})
@@ -1,6 +1,10 @@
+from django.conf import settings
 from django.shortcuts import render
+from django.views.static import serve
 from http import HTTPStatus
 
+from .storage import is_hashed
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path},
@@ -20,3 +24,15 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def media(request, path):
+    """Отдаёт загруженные файлы при DEBUG.
+
+    Имя файла в хранилище по содержимому не меняется, пока жив файл,
+    поэтому такие файлы кэшируются бессрочно.
+    """
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    if is_hashed(path):
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
@@ -0,0 +1,82 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются атомарными UPDATE с F()-выражениями в обработчиках
+сигналов. Модели со счётчиками сохраняются в одной транзакции со своими
+post_save (AtomicSaveModel), так что откат сохранения откатывает и
+счётчики. recount() пересчитывает их с нуля, если они всё же разошлись
+с данными, например после bulk_create.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Group, Post, Profile
+
+User = get_user_model()
+
+
+def _increment(queryset, field, delta, **extra):
+    if delta < 0:
+        # разошедшийся счётчик не уводим в минус, его поправит recount()
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta}, **extra)
+
+
+def change_profile(user_id, field, delta):
+    """Меняет счётчик пользователя, создавая профиль при необходимости."""
+    profiles = Profile.objects.filter(user_id=user_id)
+    if not _increment(profiles, field, delta) and delta > 0:
+        with transaction.atomic():
+            Profile.objects.get_or_create(user_id=user_id)
+            recount_profiles(profiles)
+
+
+def change_group(group_id, delta):
+    if group_id is not None:
+        _increment(Group.objects.filter(pk=group_id), 'posts_count', delta)
+
+
+def change_post(post_id, delta):
+    # число комментариев выводится в карточке поста, поэтому меняем и версию
+    _increment(Post.objects.filter(pk=post_id), 'comments_count', delta,
+               version=F('version') + 1)
+
+
+def group_posts(slug):
+    """Число постов группы по счётчику, без COUNT(*) по постам."""
+    return Group.objects.filter(slug=slug).values_list(
+        'posts_count', flat=True).first() or 0
+
+
+def author_posts(username):
+    """Число постов автора по счётчику профиля."""
+    return Profile.objects.filter(user__username=username).values_list(
+        'posts_count', flat=True).first() or 0
+
+
+def _count(model, field, outer='pk'):
+    counts = model.objects.filter(**{field: OuterRef(outer)}).order_by()
+    counts = counts.values(field).annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(counts), 0)
+
+
+def recount_profiles(profiles):
+    return profiles.update(
+        posts_count=_count(Post, 'author', 'user'),
+        followers_count=_count(Follow, 'author', 'user'),
+        following_count=_count(Follow, 'user', 'user'),
+    )
+
+
+def recount():
+    """Пересчитывает все счётчики и создаёт недостающие профили."""
+    with transaction.atomic():
+        Profile.objects.bulk_create(
+            Profile(user_id=user_id)
+            for user_id in User.objects.filter(
+                profile__isnull=True).values_list('pk', flat=True)
+        )
+        recount_profiles(Profile.objects.all())
+        Group.objects.update(posts_count=_count(Post, 'group'))
+        Post.objects.update(comments_count=_count(Comment, 'post'))
@@ -0,0 +1,108 @@
+"""События о новых постах и комментариях (Server-Sent Events).
+
+Обработчики сигналов публикуют id новых объектов в каналы core.pubsub
+после коммита транзакции. Поток text/event-stream пересылает их
+браузеру, а разметку новых карточек браузер подгружает отдельным
+запросом. id события — id объекта: по заголовку Last-Event-ID при
+переподключении досылаются пропущенные объекты из базы.
+"""
+import json
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+
+from core import pubsub
+
+INDEX = 'posts:index'
+
+
+def group(group_id):
+    return f'posts:group:{group_id}'
+
+
+def author(author_id):
+    return f'posts:author:{author_id}'
+
+
+def comments(post_id):
+    return f'posts:comments:{post_id}'
+
+
+def _publish(channels, message):
+    for channel in channels:
+        pubsub.publish(channel, message)
+
+
+def post_created(post):
+    channels = [INDEX, author(post.author_id)]
+    if post.group_id:
+        channels.append(group(post.group_id))
+    message = {'id': post.pk}
+    transaction.on_commit(lambda: _publish(channels, message))
+
+
+def comment_created(comment):
+    message = {'id': comment.pk}
+    channels = [comments(comment.post_id)]
+    transaction.on_commit(lambda: _publish(channels, message))
+
+
+def post_url(pk):
+    return reverse('posts:post_card', args=[pk])
+
+
+def comment_url(post_id):
+    return lambda pk: reverse('posts:comment_card', args=[post_id, pk])
+
+
+def format_event(event, pk, url):
+    data = json.dumps({'id': pk, 'url': url})
+    return f'id: {pk}\nevent: {event}\ndata: {data}\n\n'
+
+
+def _last_id(request):
+    try:
+        return int(request.META.get('HTTP_LAST_EVENT_ID', ''))
+    except ValueError:
+        return None
+
+
+def _stream(channels, event, url, missed):
+    yield f'retry: {settings.EVENTS_HEARTBEAT * 1000}\n\n'
+    deadline = time.monotonic() + settings.EVENTS_LIFETIME
+    with pubsub.subscribe(channels) as subscription:
+        # подписка оформлена до чтения базы, поэтому событие между
+        # чтением и подпиской не теряется, а повтор отсекается по id
+        caught_up = missed()
+        for pk in sorted(caught_up):
+            yield format_event(event, pk, url(pk))
+        while time.monotonic() < deadline:
+            message = subscription.get(timeout=settings.EVENTS_HEARTBEAT)
+            if message is None:
+                yield ': ping\n\n'
+            elif message[1]['id'] not in caught_up:
+                pk = message[1]['id']
+                yield format_event(event, pk, url(pk))
+
+
+def stream(request, channels, queryset, event, url):
+    """Ответ text/event-stream с новыми объектами queryset из channels."""
+    last_id = _last_id(request)
+
+    def missed():
+        if last_id is None:
+            return set()
+        return set(
+            queryset.filter(pk__gt=last_id).order_by('pk')
+            .values_list('pk', flat=True)[:settings.EVENTS_CATCH_UP])
+
+    response = StreamingHttpResponse(
+        _stream(channels, event, url, missed),
+        content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx не должен буферизовать поток
+    response['X-Accel-Buffering'] = 'no'
+    return response
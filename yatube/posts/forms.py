@@ -1,5 +1,8 @@
 from django import forms
-from .models import Post, Comment
+from django.core.files.uploadedfile import UploadedFile
+
+from . import images
+from .models import Post, Comment, Group, User
 
 
 class PostForm(forms.ModelForm):
@@ -12,6 +15,12 @@ class PostForm(forms.ModelForm):
             'image': 'Картинка для поста',
         }
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile):
+            return images.process(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -20,3 +29,24 @@ class CommentForm(forms.ModelForm):
         help_texts = {
             'text': 'Текст комментария',
         }
+
+
+class SearchForm(forms.Form):
+    q = forms.CharField(label='Найти', max_length=200, required=False)
+    group = forms.ModelChoiceField(
+        label='Группа',
+        queryset=Group.objects.all(),
+        to_field_name='slug',
+        required=False,
+        empty_label='Все группы',
+    )
+    author = forms.CharField(label='Автор', max_length=150, required=False)
+
+    def clean_author(self):
+        username = self.cleaned_data['author']
+        if not username:
+            return None
+        author = User.objects.filter(username=username).first()
+        if author is None:
+            raise forms.ValidationError('Такого автора нет')
+        return author
@@ -0,0 +1,86 @@
+"""Условные GET-запросы (ETag и Last-Modified) для лент и страницы поста.
+
+Для каждой области — весь сайт, главная лента, группа, автор — в кэше
+хранится момент её последнего изменения. Обработчики сигналов обновляют
+эти метки, а представления по ним отвечают 304 Not Modified, не выбирая
+посты и не рисуя шаблон.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.views.decorators.http import condition
+
+# изменения, которые видны во всех лентах: название группы, имя автора,
+# готовые миниатюры
+SITE = 'site'
+INDEX = 'index'
+
+
+def group(group_id):
+    return None if group_id is None else f'group:{group_id}'
+
+
+def author(user_id):
+    return f'author:{user_id}'
+
+
+def _key(scope):
+    return f'freshness:{scope}'
+
+
+def touch(*scopes):
+    """Отмечает, что содержимое областей изменилось."""
+    now = time.time()
+    cache.set_many(
+        {_key(scope): now for scope in scopes if scope is not None}, None)
+
+
+def stamps(*scopes):
+    """Моменты последних изменений областей.
+
+    Метка, которой нет в кэше, создаётся текущим временем: после
+    очистки кэша клиенты один раз получат страницу целиком.
+    """
+    keys = [_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = {key: time.time() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def _validators(request, resolve, args, kwargs):
+    if not hasattr(request, '_freshness'):
+        resolved = resolve(request, *args, **kwargs)
+        if resolved is None:
+            request._freshness = None, None
+            return request._freshness
+        scopes, extra = resolved
+        values = stamps(SITE, *scopes)
+        # страница зависит от пользователя: шапка, подписка, кнопка правки
+        token = repr((values, extra, request.user.pk)).encode()
+        last_modified = None
+        if not request.user.is_authenticated:
+            last_modified = datetime.fromtimestamp(
+                max(values), tz=timezone.utc)
+        request._freshness = hashlib.md5(token).hexdigest(), last_modified
+    return request._freshness
+
+
+def conditional(resolve):
+    """Декоратор условного GET для представления.
+
+    resolve(request, *args, **kwargs) возвращает пару (области, доп.
+    данные для ETag) или None, если объекта нет. Last-Modified отдаётся
+    только анонимам: страница пользователя в If-Modified-Since не видна.
+    """
+    def etag(request, *args, **kwargs):
+        return _validators(request, resolve, args, kwargs)[0]
+
+    def last_modified(request, *args, **kwargs):
+        return _validators(request, resolve, args, kwargs)[1]
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
@@ -0,0 +1,147 @@
+"""Граф подписок в кэше.
+
+Для каждого пользователя в кэше лежат два отсортированных массива
+целых чисел (array('q')): на кого он подписан и кто подписан на него.
+Проверка подписки — двоичный поиск, общие подписки — слияние двух
+массивов, «кого почитать» — подсчёт подписок тех, на кого подписан
+пользователь. Подписка и отписка удаляют массивы обоих пользователей:
+сразу и ещё раз после коммита, чтобы в кэше не осталось массива,
+прочитанного другим запросом до коммита. Следующее обращение
+перечитывает массив из базы одним запросом. Массивы живут
+FOLLOW_GRAPH_TIMEOUT секунд.
+"""
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow
+
+FOLLOWING = 'following'
+FOLLOWERS = 'followers'
+# поле, по которому группируются и поле, которое собирается в массив
+_COLUMNS = {
+    FOLLOWING: ('user_id', 'author_id'),
+    FOLLOWERS: ('author_id', 'user_id'),
+}
+
+
+def _key(kind, user_id):
+    return f'graph:{kind}:{user_id}'
+
+
+def _load(kind, user_ids):
+    """Массивы для пользователей, которых нет в кэше, одним запросом."""
+    owner, other = _COLUMNS[kind]
+    loaded = {user_id: [] for user_id in user_ids}
+    rows = Follow.objects.filter(**{f'{owner}__in': user_ids}).values_list(
+        owner, other).order_by(owner, other)
+    for user_id, other_id in rows:
+        loaded[user_id].append(other_id)
+    return {user_id: array('q', ids) for user_id, ids in loaded.items()}
+
+
+def _get_many(kind, user_ids):
+    keys = {_key(kind, user_id): user_id for user_id in user_ids}
+    found = {keys[key]: ids for key, ids in cache.get_many(keys).items()}
+    missing = [user_id for user_id in user_ids if user_id not in found]
+    if missing:
+        loaded = _load(kind, missing)
+        cache.set_many(
+            {_key(kind, user_id): ids for user_id, ids in loaded.items()},
+            settings.FOLLOW_GRAPH_TIMEOUT)
+        found.update(loaded)
+    return found
+
+
+def following(user_id):
+    """Отсортированные id авторов, на которых подписан пользователь."""
+    return _get_many(FOLLOWING, [user_id])[user_id]
+
+
+def followers(user_id):
+    """Отсортированные id подписчиков пользователя."""
+    return _get_many(FOLLOWERS, [user_id])[user_id]
+
+
+def _contains(ids, value):
+    position = bisect_left(ids, value)
+    return position < len(ids) and ids[position] == value
+
+
+def _intersect(left, right):
+    result, i, j = [], 0, 0
+    while i < len(left) and j < len(right):
+        if left[i] < right[j]:
+            i += 1
+        elif left[i] > right[j]:
+            j += 1
+        else:
+            result.append(left[i])
+            i += 1
+            j += 1
+    return result
+
+
+def is_following(user_id, author_id):
+    return _contains(following(user_id), author_id)
+
+
+def followed_among(user_id, author_ids):
+    """Те из author_ids, на кого подписан пользователь."""
+    authors = following(user_id)
+    return {
+        author_id for author_id in author_ids
+        if _contains(authors, author_id)
+    }
+
+
+def signature(user_id):
+    """Контрольная сумма подписок: меняется с каждой подпиской и отпиской."""
+    return zlib.crc32(following(user_id))
+
+
+def mutual(user_id, author_id):
+    """Подписчики автора среди тех, на кого подписан пользователь."""
+    return _intersect(following(user_id), followers(author_id))
+
+
+def suggestions(user_id, limit=None, exclude=()):
+    """Авторы, на которых подписаны авторы пользователя, но не он сам.
+
+    Авторы из exclude (например, тот, чей профиль открыт) не советуются.
+    Чем больше авторов пользователя подписаны на кандидата, тем он выше;
+    при равенстве выше тот, кто раньше зарегистрировался.
+    """
+    if limit is None:
+        limit = settings.FOLLOW_SUGGESTIONS
+    authors = following(user_id)
+    # у очень активного читателя смотрим только часть его подписок
+    scanned = list(islice(authors, settings.FOLLOW_GRAPH_SCAN))
+    votes = Counter()
+    for ids in _get_many(FOLLOWING, scanned).values():
+        votes.update(ids)
+    candidates = sorted(
+        (-count, author_id) for author_id, count in votes.items()
+        if author_id != user_id and author_id not in exclude
+        and not _contains(authors, author_id))
+    return [author_id for _, author_id in candidates[:limit]]
+
+
+def forget(user_ids):
+    """Забывает оба массива пользователей, например после импорта."""
+    cache.delete_many([
+        _key(kind, user_id)
+        for user_id in user_ids for kind in (FOLLOWING, FOLLOWERS)])
+
+
+def invalidate(user_id, author_id):
+    """Забывает массивы обоих участников подписки или отписки."""
+    keys = [_key(FOLLOWING, user_id), _key(FOLLOWERS, author_id)]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
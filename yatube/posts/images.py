@@ -0,0 +1,95 @@
+"""Подготовка загруженных картинок постов.
+
+Размер картинки проверяется по заголовку файла, без декодирования
+пикселей. Картинка больше POST_IMAGE_MAX_SIZE уменьшается (JPEG сразу
+декодируется в уменьшенном масштабе), поворачивается по EXIF, теряет
+все метаданные и один раз перекодируется в первый поддерживаемый
+формат из POST_IMAGE_FORMATS. Результат пишется во временный файл,
+который уходит на диск, как только перерастает
+FILE_UPLOAD_MAX_MEMORY_SIZE.
+"""
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from PIL import Image, ImageOps
+
+EXTENSIONS = {
+    'AVIF': 'avif',
+    'WEBP': 'webp',
+    'JPEG': 'jpg',
+}
+# GIF не содержит EXIF, а перекодирование анимации её испортит
+PASSTHROUGH_FORMATS = {'GIF'}
+
+
+def output_format():
+    """Первый формат из POST_IMAGE_FORMATS, который умеет сохранять Pillow."""
+    Image.init()
+    for image_format in settings.POST_IMAGE_FORMATS:
+        if image_format in Image.SAVE:
+            return image_format
+    return 'JPEG'
+
+
+def _check(upload, image):
+    if upload.size > settings.POST_IMAGE_MAX_UPLOAD_SIZE:
+        raise ValidationError(
+            'Файл больше %(limit)d МБ',
+            params={'limit': settings.POST_IMAGE_MAX_UPLOAD_SIZE >> 20},
+            code='file_too_large',
+        )
+    width, height = image.size
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Слишком большое разрешение: %(width)d×%(height)d',
+            params={'width': width, 'height': height},
+            code='too_many_pixels',
+        )
+
+
+def _encode(image, image_format):
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(settings.POST_IMAGE_MAX_SIZE, Image.LANCZOS)
+    has_alpha = image.mode in ('RGBA', 'LA') or (
+        image.mode == 'P' and 'transparency' in image.info)
+    if image_format == 'JPEG' or not has_alpha:
+        if has_alpha:
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.convert('RGBA').split()[-1])
+            image = background
+        else:
+            image = image.convert('RGB')
+    else:
+        image = image.convert('RGBA')
+    output = tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+    # метаданные (EXIF, ICC, XMP) не передаются и в файл не попадают
+    image.save(output, image_format, quality=settings.POST_IMAGE_QUALITY,
+               optimize=image_format == 'JPEG')
+    output.seek(0)
+    return output
+
+
+def process(upload):
+    """Проверяет загруженную картинку и возвращает файл для сохранения."""
+    upload.seek(0)
+    # Image.open читает только заголовок, пиксели ещё не декодированы
+    image = Image.open(upload)
+    _check(upload, image)
+    if image.format in PASSTHROUGH_FORMATS:
+        upload.seek(0)
+        return upload
+    image_format = output_format()
+    if image.format == 'JPEG':
+        # декодер JPEG умеет сразу уменьшать картинку в 2, 4 или 8 раз
+        image.draft('RGB', settings.POST_IMAGE_MAX_SIZE)
+    try:
+        output = _encode(image, image_format)
+    except (OSError, ValueError):
+        raise ValidationError(
+            'Не удалось обработать картинку', code='invalid_image')
+    stem = os.path.splitext(os.path.basename(upload.name))[0]
+    return File(output, name=f'{stem}.{EXTENSIONS[image_format]}')
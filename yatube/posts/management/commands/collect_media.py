@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import media
+
+
+class Command(BaseCommand):
+    help = ('Удаляет файлы картинок, на которые больше не ссылается '
+            'ни один пост, вместе с их миниатюрами.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours', type=float,
+            default=settings.MEDIA_GC_GRACE_HOURS,
+            help='Сколько часов файл без ссылок хранится до удаления.')
+        parser.add_argument(
+            '--recount', action='store_true',
+            help='Сначала пересчитать ссылки по таблице постов.')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, grace_hours, recount, dry_run, **options):
+        if recount:
+            media.recount()
+        deleted = media.collect(
+            timedelta(hours=grace_hours), dry_run=dry_run)
+        for name in deleted:
+            self.stdout.write(name)
+        verb = 'Будет удалено' if dry_run else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(f'{verb} файлов: {len(deleted)}'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = ('Уменьшает счета популярности постов с учётом прошедшего '
+            'времени. Запускается по расписанию, например раз в сутки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Посчитать счета заново по постам и комментариям.')
+
+    def handle(self, *args, rebuild, **options):
+        if rebuild:
+            count = trending.rebuild()
+            self.stdout.write(self.style.SUCCESS(
+                f'Счета пересчитаны, постов с событиями: {count}'))
+            return
+        count = trending.compact()
+        self.stdout.write(self.style.SUCCESS(f'Обновлено постов: {count}'))
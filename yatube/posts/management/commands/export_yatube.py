@@ -0,0 +1,46 @@
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = ('Выгружает пользователей, группы, посты, комментарии и подписки '
+            'в NDJSON или в каталог с CSV-файлами.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл NDJSON («-» — стандартный вывод) или каталог для CSV.')
+        parser.add_argument(
+            '--format', choices=('ndjson', 'csv'), default='ndjson')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, path, format, batch_size, **options):
+        if format == 'csv':
+            if path == '-':
+                raise CommandError('Для CSV нужно указать каталог.')
+            os.makedirs(path, exist_ok=True)
+            stream = None
+        elif path == '-':
+            stream = sys.stdout
+        else:
+            stream = open(path, 'w', encoding='utf-8')
+        try:
+            for model in transfer.MODELS:
+                started = time.monotonic()
+                rows = transfer.export_rows(model, batch_size)
+                if stream is None:
+                    count = transfer.write_csv(path, model, rows)
+                else:
+                    count = transfer.write_ndjson(stream, model, rows)
+                seconds = time.monotonic() - started
+                self.stderr.write(
+                    f'{model}: {count} строк, '
+                    f'{count / seconds if seconds else 0:.0f} строк/с')
+        finally:
+            if stream not in (None, sys.stdout):
+                stream.close()
@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import (counters, freshness, graph, media, search, timeline,
+                   transfer, trending)
+
+
+class Command(BaseCommand):
+    help = ('Загружает пользователей, группы, посты, комментарии и подписки '
+            'из NDJSON или из каталога с CSV-файлами.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл NDJSON («-» — стандартный ввод) или каталог с CSV.')
+        parser.add_argument(
+            '--format', choices=('ndjson', 'csv'),
+            help='По умолчанию CSV для каталога и NDJSON для файла.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, path, format, batch_size, **options):
+        format = format or ('csv' if os.path.isdir(path) else 'ndjson')
+        if format == 'csv':
+            if not os.path.isdir(path):
+                raise CommandError(f'Каталог {path} не найден.')
+            stream = None
+            records = transfer.read_csv(path)
+        else:
+            stream = sys.stdin if path == '-' else open(path, encoding='utf-8')
+            records = transfer.read_ndjson(stream)
+        importer = transfer.Importer(batch_size)
+        try:
+            stats = importer.run(records)
+        except ValueError as error:
+            raise CommandError(error)
+        finally:
+            if stream not in (None, sys.stdin):
+                stream.close()
+        for model, model_stats in stats.items():
+            self.stdout.write(
+                f'{model}: {model_stats.rows} строк, '
+                f'пропущено {model_stats.skipped}, '
+                f'{model_stats.rate:.0f} строк/с')
+        # bulk_create не отправляет сигналы, поэтому производные данные
+        # пересчитываются целиком
+        started = time.monotonic()
+        counters.recount()
+        media.recount()
+        timeline.rebuild()
+        search.rebuild()
+        trending.rebuild()
+        graph.forget(importer.follow_users)
+        # новые посты, группы и имена авторов видны во всех лентах
+        freshness.touch(freshness.SITE)
+        self.stdout.write(
+            f'Счётчики, ленты и поиск обновлены за '
+            f'{time.monotonic() - started:.1f} с')
+        self.stdout.write(self.style.SUCCESS('Импорт завершён.'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+
+
+class Command(BaseCommand):
+    help = ('Создаёт миниатюры картинок постов, у которых их ещё нет, '
+            'например после импорта.')
+
+    def handle(self, *args, **options):
+        names = list(thumbnails.missing())
+        for name in names:
+            thumbnails.generate(name)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано картинок: {len(names)}'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс постов и комментариев.'
+
+    def handle(self, *args, **options):
+        if not search.rebuild():
+            raise CommandError(
+                'Поисковый индекс недоступен для этой базы данных.')
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс перестроен.'))
@@ -0,0 +1,105 @@
+"""Счётчики ссылок на файлы картинок и сборка мусора.
+
+Одинаковые картинки хранятся одним файлом (core.storage), поэтому файл
+нельзя удалять вместе с постом: сначала у него должно не остаться
+ссылок. Ссылки считаются в MediaBlob обработчиками сигналов Post,
+а файлы без ссылок удаляет collect().
+"""
+import os
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from sorl.thumbnail import delete as delete_thumbnails
+from sorl.thumbnail.images import ImageFile
+
+from .models import MediaBlob, Post
+
+storage = Post._meta.get_field('image').storage
+
+
+def retain(name):
+    if not name:
+        return
+    if MediaBlob.objects.filter(name=name).update(
+            refs=F('refs') + 1, released=None):
+        return
+    try:
+        with transaction.atomic():
+            MediaBlob.objects.create(name=name, refs=1)
+    except IntegrityError:
+        retain(name)
+
+
+def release(name):
+    if not name:
+        return
+    blobs = MediaBlob.objects.filter(name=name)
+    blobs.filter(refs__gt=0).update(refs=F('refs') - 1)
+    blobs.filter(refs=0, released__isnull=True).update(
+        released=timezone.now())
+
+
+def recount():
+    """Пересчитывает ссылки по таблице постов."""
+    refs = dict(
+        Post.objects.exclude(image='').exclude(image__isnull=True)
+        .values('image').annotate(refs=Count('pk')).order_by()
+        .values_list('image', 'refs')
+    )
+    now = timezone.now()
+    with transaction.atomic():
+        for blob in MediaBlob.objects.select_for_update():
+            count = refs.pop(blob.name, 0)
+            if count != blob.refs:
+                blob.refs = count
+                blob.released = None if count else now
+                blob.save(update_fields=['refs', 'released'])
+        MediaBlob.objects.bulk_create(
+            MediaBlob(name=name, refs=count) for name, count in refs.items())
+
+
+def _delete(name):
+    delete_thumbnails(ImageFile(name, storage), delete_file=False)
+    storage.delete(name)
+
+
+def _stored_files(directory):
+    directories, files = storage.listdir(directory)
+    for filename in files:
+        yield os.path.join(directory, filename).replace('\\', '/')
+    for subdirectory in directories:
+        yield from _stored_files(os.path.join(directory, subdirectory))
+
+
+def _orphans(directory, before):
+    known = set(MediaBlob.objects.values_list('name', flat=True))
+    for name in _stored_files(directory):
+        if name in known or storage.get_modified_time(name) > before:
+            continue
+        if not Post.objects.filter(image=name).exists():
+            yield name
+
+
+def collect(grace, dry_run=False, directory='posts'):
+    """Удаляет файлы без ссылок дольше grace и возвращает их имена.
+
+    Файлы, которых нет в MediaBlob (например, загруженные в транзакции,
+    которая потом откатилась), тоже удаляются, если старше grace.
+    """
+    before = timezone.now() - grace
+    deleted = []
+    blobs = MediaBlob.objects.filter(refs=0, released__lt=before)
+    for blob in blobs.iterator():
+        if Post.objects.filter(image=blob.name).exists():
+            continue
+        if not dry_run:
+            _delete(blob.name)
+            blob.delete()
+        deleted.append(blob.name)
+    if storage.exists(directory):
+        for name in list(_orphans(directory, before)):
+            if not dry_run:
+                _delete(name)
+            deleted.append(name)
+    return deleted
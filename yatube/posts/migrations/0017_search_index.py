@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.utils import OperationalError
+
+SQLITE_CREATE = [
+    "CREATE VIRTUAL TABLE posts_search USING fts5("
+    "text, post_id UNINDEXED, comment_id UNINDEXED, "
+    "tokenize = 'unicode61 remove_diacritics 2')",
+    "INSERT INTO posts_search (rowid, text, post_id, comment_id) "
+    "SELECT id * 2, text, id, 0 FROM posts_post",
+    "INSERT INTO posts_search (rowid, text, post_id, comment_id) "
+    "SELECT id * 2 + 1, text, post_id, id FROM posts_comment",
+]
+
+POSTGRES_CREATE = [
+    "CREATE TABLE posts_search ("
+    "id bigint PRIMARY KEY, post_id integer NOT NULL, "
+    "comment_id integer NOT NULL, document tsvector NOT NULL)",
+    "CREATE INDEX posts_search_document ON posts_search "
+    "USING GIN (document)",
+    "CREATE INDEX posts_search_post ON posts_search (post_id)",
+    "INSERT INTO posts_search (id, post_id, comment_id, document) "
+    "SELECT id * 2, id, 0, to_tsvector(%s, text) FROM posts_post",
+    "INSERT INTO posts_search (id, post_id, comment_id, document) "
+    "SELECT id * 2 + 1, post_id, id, to_tsvector(%s, text) "
+    "FROM posts_comment",
+]
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        statements, params = SQLITE_CREATE, None
+    elif connection.vendor == 'postgresql':
+        statements, params = POSTGRES_CREATE, [settings.SEARCH_CONFIG]
+    else:
+        return
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(statements[0])
+        except OperationalError:
+            # SQLite собран без FTS5: поиск будет работать через LIKE
+            return
+        for statement in statements[1:]:
+            cursor.execute(statement, params if '%s' in statement else None)
+
+
+def drop_search_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS posts_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_post_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
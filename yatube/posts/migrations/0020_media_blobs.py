@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-17 06:25
+
+import core.storage
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_media_blobs(apps, schema_editor):
+    MediaBlob = apps.get_model('posts', 'MediaBlob')
+    Post = apps.get_model('posts', 'Post')
+    refs = (
+        Post.objects.exclude(image='').exclude(image__isnull=True)
+        .values('image').annotate(refs=Count('pk')).order_by()
+        .values_list('image', 'refs')
+    )
+    MediaBlob.objects.bulk_create(
+        MediaBlob(name=name, refs=count) for name, count in refs.iterator())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_comment_ordering'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('refs', models.PositiveIntegerField(default=0)),
+                ('released', models.DateTimeField(blank=True, null=True, verbose_name='Когда пропала последняя ссылка')),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.HashedMediaStorage(), upload_to='posts/', verbose_name='Картинка'),
+        ),
+        migrations.RunPython(fill_media_blobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+from django.utils import timezone
+
+
+def create_epoch(apps, schema_editor):
+    # строка нужна с самого начала: иначе первый пост после деплоя
+    # создаёт её сам, лишними запросами в бюджете публикации
+    TrendingEpoch = apps.get_model('posts', 'TrendingEpoch')
+    TrendingEpoch.objects.get_or_create(
+        pk=1, defaults={'epoch': timezone.now()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_post_thumbnails'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_epoch, migrations.RunPython.noop),
+    ]
@@ -1,19 +1,46 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.contrib.auth import get_user_model
 
+from core.storage import hashed_storage
+
 User = get_user_model()
 
 
+class AtomicSaveModel(models.Model):
+    """Модель, которая сохраняется в одной транзакции с post_save.
+
+    Обработчики post_save меняют денормализованные счётчики, поэтому
+    откат сохранения или падение процесса откатывают и их. post_delete
+    Django и так отправляет внутри транзакции удаления.
+    """
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self)
+        # как Model.save_base для наследуемых моделей: без точки
+        # сохранения, внутри чужой транзакции ошибка откатывает её целиком
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+
+
 class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Количество постов',
+        default=0,
+        editable=False,
+    )
 
     def __str__(self):
         return self.title
 
 
-class Post(models.Model):
+class Post(AtomicSaveModel):
     text = models.TextField(verbose_name='Текст поста')
     pub_date = models.DateTimeField(
         verbose_name='Дата публикации',
@@ -35,19 +62,63 @@ class Post(models.Model):
     image = models.ImageField(
         verbose_name='Картинка',
         upload_to='posts/',
+        storage=hashed_storage,
         blank=True,
         null=True,
     )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Количество комментариев',
+        default=0,
+        editable=False,
+    )
+    # имена готовых миниатюр картинки по размерам из POST_THUMBNAILS
+    # в JSON (posts.thumbnails); пусто, пока они не созданы
+    thumbnails = models.TextField(
+        verbose_name='Миниатюры',
+        blank=True,
+        default='',
+        editable=False,
+    )
+    # входит в ключ кэша карточки поста, растёт при каждом её изменении
+    version = models.PositiveIntegerField(
+        verbose_name='Версия',
+        default=1,
+        editable=False,
+    )
+    # счёт популярности относительно TrendingEpoch (posts.trending)
+    trending_score = models.FloatField(
+        verbose_name='Популярность',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         ordering = ['-pub_date']
         default_related_name = 'posts'
+        # ленты группы и автора выбираются по индексу уже в нужном
+        # порядке, без сортировки во временном B-дереве
+        indexes = [
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['-trending_score', '-id'],
+                         name='post_trending_idx'),
+        ]
 
     def __str__(self):
         return self.text
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        # значения из базы: по ним сигналы видят, что изменилось, без
+        # повторного запроса перед сохранением
+        post._loaded_values = dict(zip(field_names, values))
+        return post
 
-class Comment(models.Model):
+
+class Comment(AtomicSaveModel):
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
@@ -67,11 +138,19 @@ class Comment(models.Model):
         db_index=True,
     )
 
+    class Meta:
+        ordering = ['created', 'id']
+        # комментарии поста читаются страницами по курсору (created, id)
+        indexes = [
+            models.Index(fields=['post', 'created', 'id'],
+                         name='comment_post_created_id_idx'),
+        ]
+
     def __str__(self):
         return self.text
 
 
-class Follow(models.Model):
+class Follow(AtomicSaveModel):
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -88,3 +167,95 @@ class Follow(models.Model):
             models.UniqueConstraint(fields=['user', 'author'],
                                     name='unique_follow')
         ]
+        # подписчики автора: при раскладке постов по лентам
+        indexes = [
+            models.Index(fields=['author', 'user'],
+                         name='follow_author_user_idx'),
+        ]
+
+
+class Profile(models.Model):
+    """Денормализованные счётчики пользователя."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='profile',
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Количество постов',
+        default=0,
+        editable=False,
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Количество подписчиков',
+        default=0,
+        editable=False,
+    )
+    following_count = models.PositiveIntegerField(
+        verbose_name='Количество подписок',
+        default=0,
+        editable=False,
+    )
+
+    def __str__(self):
+        return self.user.username
+
+
+class TimelineEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique_timeline_entry')
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_user_pub_date_idx'),
+            models.Index(fields=['user', 'author'],
+                         name='timeline_user_author_idx'),
+        ]
+
+
+class MediaBlob(models.Model):
+    """Файл картинки в хранилище и число постов, которые на него ссылаются.
+
+    Файл с нулём ссылок удаляет команда collect_media.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    refs = models.PositiveIntegerField(default=0)
+    released = models.DateTimeField(
+        verbose_name='Когда пропала последняя ссылка',
+        null=True,
+        blank=True,
+    )
+
+    def __str__(self):
+        return self.name
+
+
+class TrendingEpoch(models.Model):
+    """Момент, относительно которого хранятся счета популярности постов.
+
+    Запись одна; её переносит вперёд команда compact_trending.
+    """
+    epoch = models.DateTimeField()
+
+    def __str__(self):
+        return str(self.epoch)
@@ -0,0 +1,208 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+Тексты постов и комментариев лежат в отдельной таблице posts_search:
+на SQLite это виртуальная таблица FTS5, на PostgreSQL — таблица
+с tsvector и GIN-индексом. Каждая строка указывает на пост, поэтому
+совпадение в комментарии тоже находит пост, а общий ранг поста
+складывается из рангов его строк (текст поста весит вдвое больше).
+Если ни один из движков недоступен, поиск выполняется через LIKE.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Comment, Post
+
+TABLE = 'posts_search'
+POST_WEIGHT = 2
+
+
+def _post_row_id(post_id):
+    return post_id * 2
+
+
+def _comment_row_id(comment_id):
+    return comment_id * 2 + 1
+
+
+_ready = set()
+
+
+def _table_exists():
+    # положительный ответ запоминается для каждой базы, отрицательный
+    # перепроверяется: таблица может появиться после миграции
+    key = (connection.alias, connection.settings_dict['NAME'])
+    if key not in _ready:
+        if TABLE not in connection.introspection.table_names():
+            return False
+        _ready.add(key)
+    return True
+
+
+class SqliteBackend:
+    def index(self, cursor, row_id, post_id, comment_id, text):
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [row_id])
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, text, post_id, comment_id) '
+            'VALUES (%s, %s, %s, %s)',
+            [row_id, text, post_id, comment_id],
+        )
+
+    def remove(self, cursor, row_id):
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [row_id])
+
+    def remove_post(self, cursor, post_id):
+        cursor.execute(f'DELETE FROM {TABLE} WHERE post_id = %s', [post_id])
+
+    def rebuild(self, cursor):
+        cursor.execute(f'DELETE FROM {TABLE}')
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, text, post_id, comment_id) '
+            f'SELECT id * 2, text, id, 0 FROM {Post._meta.db_table}')
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, text, post_id, comment_id) '
+            f'SELECT id * 2 + 1, text, post_id, id '
+            f'FROM {Comment._meta.db_table}')
+
+    def match(self, query):
+        words = re.findall(r'\w+', query)
+        return ' '.join(f'"{word}"*' for word in words)
+
+    def search_sql(self, query):
+        terms = self.match(query)
+        if not terms:
+            # в запросе нет ни одного слова, а пустой MATCH — ошибка FTS5
+            return None
+        return (
+            f'SELECT s.post_id, SUM(s.rank * CASE WHEN s.comment_id = 0 '
+            f'THEN {POST_WEIGHT} ELSE 1 END) AS score '
+            f'FROM {TABLE} s JOIN {Post._meta.db_table} p '
+            f'ON p.id = s.post_id WHERE {TABLE} MATCH %s'
+        ), [terms], 'score'
+
+
+class PostgresBackend:
+    def index(self, cursor, row_id, post_id, comment_id, text):
+        cursor.execute(
+            f'INSERT INTO {TABLE} (id, post_id, comment_id, document) '
+            'VALUES (%s, %s, %s, to_tsvector(%s, %s)) '
+            'ON CONFLICT (id) DO UPDATE SET document = EXCLUDED.document',
+            [row_id, post_id, comment_id, settings.SEARCH_CONFIG, text],
+        )
+
+    def remove(self, cursor, row_id):
+        cursor.execute(f'DELETE FROM {TABLE} WHERE id = %s', [row_id])
+
+    def remove_post(self, cursor, post_id):
+        cursor.execute(f'DELETE FROM {TABLE} WHERE post_id = %s', [post_id])
+
+    def rebuild(self, cursor):
+        config = settings.SEARCH_CONFIG
+        cursor.execute(f'TRUNCATE {TABLE}')
+        cursor.execute(
+            f'INSERT INTO {TABLE} (id, post_id, comment_id, document) '
+            f'SELECT id * 2, id, 0, to_tsvector(%s, text) '
+            f'FROM {Post._meta.db_table}', [config])
+        cursor.execute(
+            f'INSERT INTO {TABLE} (id, post_id, comment_id, document) '
+            f'SELECT id * 2 + 1, post_id, id, to_tsvector(%s, text) '
+            f'FROM {Comment._meta.db_table}', [config])
+
+    def search_sql(self, query):
+        return (
+            f'SELECT s.post_id, -SUM(ts_rank(s.document, q) * CASE '
+            f'WHEN s.comment_id = 0 THEN {POST_WEIGHT} ELSE 1 END) AS score '
+            f'FROM {TABLE} s JOIN {Post._meta.db_table} p '
+            f'ON p.id = s.post_id, plainto_tsquery(%s, %s) q '
+            f'WHERE s.document @@ q'
+        ), [settings.SEARCH_CONFIG, query], 'score'
+
+
+BACKENDS = {
+    'sqlite': SqliteBackend,
+    'postgresql': PostgresBackend,
+}
+
+
+def get_backend():
+    """Движок поиска для текущей БД или None, если индекса нет."""
+    backend = BACKENDS.get(connection.vendor)
+    if backend is None or not _table_exists():
+        return None
+    return backend()
+
+
+def index_post(post):
+    backend = get_backend()
+    if backend is not None:
+        with connection.cursor() as cursor:
+            backend.index(cursor, _post_row_id(post.pk), post.pk, 0,
+                          post.text)
+
+
+def index_comment(comment):
+    backend = get_backend()
+    if backend is not None:
+        with connection.cursor() as cursor:
+            backend.index(cursor, _comment_row_id(comment.pk),
+                          comment.post_id, comment.pk, comment.text)
+
+
+def remove_post(post_id):
+    """Убирает из индекса пост вместе со всеми его комментариями."""
+    backend = get_backend()
+    if backend is not None:
+        with connection.cursor() as cursor:
+            backend.remove_post(cursor, post_id)
+
+
+def remove_comment(comment_id):
+    backend = get_backend()
+    if backend is not None:
+        with connection.cursor() as cursor:
+            backend.remove(cursor, _comment_row_id(comment_id))
+
+
+def rebuild():
+    backend = get_backend()
+    if backend is not None:
+        with connection.cursor() as cursor:
+            backend.rebuild(cursor)
+    return backend is not None
+
+
+def _fallback_search(query, group=None, author=None):
+    posts = Post.objects.filter(text__icontains=query) | Post.objects.filter(
+        comments__text__icontains=query)
+    if group is not None:
+        posts = posts.filter(group=group)
+    if author is not None:
+        posts = posts.filter(author=author)
+    return list(posts.order_by('-pub_date', '-pk').values_list(
+        'pk', flat=True).distinct()[:settings.SEARCH_RESULTS_LIMIT])
+
+
+def search(query, group=None, author=None):
+    """Возвращает id постов, подходящих под запрос, от лучших к худшим."""
+    query = query.strip()
+    if not query:
+        return []
+    backend = get_backend()
+    if backend is None:
+        return _fallback_search(query, group, author)
+    prepared = backend.search_sql(query)
+    if prepared is None:
+        return []
+    sql, params, score = prepared
+    if group is not None:
+        sql += ' AND p.group_id = %s'
+        params.append(group.pk)
+    if author is not None:
+        sql += ' AND p.author_id = %s'
+        params.append(author.pk)
+    sql += f' GROUP BY s.post_id ORDER BY {score}, s.post_id DESC LIMIT %s'
+    params.append(settings.SEARCH_RESULTS_LIMIT)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,289 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import (counters, events, freshness, graph, media, search,
+               thumbnails, timeline, trending)
+from .models import Comment, Follow, Group, Post, Profile
+from .utils import AUTHOR_CARD_FIELDS
+
+User = get_user_model()
+
+# id постов, которые сейчас удаляются в этом потоке: их комментарии уходят
+# каскадом, и пересчитывать, переиндексировать и отмечать пост для каждого
+# из них незачем — всё это делают обработчики удаления самого поста
+_deleting = threading.local()
+
+
+def _post_deleting(post_id):
+    return post_id in getattr(_deleting, 'posts', ())
+
+
+@receiver(post_save, sender=User)
+def create_profile(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Profile.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=User)
+def remember_author_name(sender, instance, raw=False, update_fields=None,
+                         **kwargs):
+    instance._author_card_changed = False
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not set(update_fields) & set(
+            AUTHOR_CARD_FIELDS):
+        return
+    previous = User.objects.filter(pk=instance.pk).values_list(
+        *AUTHOR_CARD_FIELDS).first()
+    current = tuple(getattr(instance, name) for name in AUTHOR_CARD_FIELDS)
+    instance._author_card_changed = previous != current
+
+
+@receiver(post_save, sender=User)
+def bump_author_posts(sender, instance, created, raw=False, **kwargs):
+    if getattr(instance, '_author_card_changed', False):
+        instance.posts.update(version=F('version') + 1)
+        instance._author_card_changed = False
+        freshness.touch(freshness.SITE)
+
+
+@receiver(post_save, sender=Group)
+def bump_group_posts(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        instance.posts.update(version=F('version') + 1)
+        freshness.touch(freshness.SITE)
+
+
+def _loaded_group_and_image(post):
+    loaded = getattr(post, '_loaded_values', {})
+    if 'group_id' in loaded and 'image' in loaded:
+        return loaded['group_id'], loaded['image']
+    return None
+
+
+@receiver(pre_save, sender=Post)
+def prepare_post_update(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._previous_group_id, instance._previous_image = (
+            _loaded_group_and_image(instance)
+            or Post.objects.filter(pk=instance.pk).values_list(
+                'group_id', 'image').first() or (None, None))
+        instance.version += 1
+        if (instance._previous_image or '') != (instance.image.name or ''):
+            # миниатюры старой картинки новой не подходят
+            instance.thumbnails = ''
+
+
+@receiver(post_save, sender=Post)
+def remember_saved_post(sender, instance, **kwargs):
+    # следующее сохранение того же объекта сравнивает с этими значениями
+    instance._loaded_values = {
+        'group_id': instance.group_id,
+        'image': instance.image.name,
+    }
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.change_profile(instance.author_id, 'posts_count', 1)
+        counters.change_group(instance.group_id, 1)
+        return
+    previous_group_id = getattr(instance, '_previous_group_id', None)
+    if previous_group_id != instance.group_id:
+        counters.change_group(previous_group_id, -1)
+        counters.change_group(instance.group_id, 1)
+        freshness.touch(freshness.group(previous_group_id))
+    instance._previous_group_id = instance.group_id
+
+
+@receiver(pre_delete, sender=Post)
+def mark_deleting_post(sender, instance, **kwargs):
+    if not hasattr(_deleting, 'posts'):
+        _deleting.posts = set()
+    _deleting.posts.add(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def unmark_deleting_post(sender, instance, **kwargs):
+    _deleting.posts.discard(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    counters.change_profile(instance.author_id, 'posts_count', -1)
+    counters.change_group(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_post(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    if not _post_deleting(instance.post_id):
+        counters.change_post(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_profile(instance.author_id, 'followers_count', 1)
+        counters.change_profile(instance.user_id, 'following_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    counters.change_profile(instance.author_id, 'followers_count', -1)
+    counters.change_profile(instance.user_id, 'following_count', -1)
+
+
+@receiver(post_save, sender=Follow)
+def add_follow_edge(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        graph.invalidate(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def remove_follow_edge(sender, instance, **kwargs):
+    graph.invalidate(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    timeline.prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.remove_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    if not _post_deleting(instance.post_id):
+        search.remove_comment(instance.pk)
+
+
+def touch_post(post):
+    freshness.touch(
+        freshness.INDEX,
+        freshness.group(post.group_id),
+        freshness.author(post.author_id),
+    )
+
+
+@receiver(post_save, sender=Post)
+def touch_saved_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        touch_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def touch_deleted_post(sender, instance, **kwargs):
+    touch_post(instance)
+
+
+@receiver(post_save, sender=Comment)
+def touch_commented_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        touch_post(instance.post)
+
+
+@receiver(post_delete, sender=Comment)
+def touch_uncommented_post(sender, instance, **kwargs):
+    if _post_deleting(instance.post_id):
+        return
+    post = Post.objects.filter(pk=instance.post_id).only(
+        'group_id', 'author_id').first()
+    if post is not None:
+        touch_post(post)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def touch_follow(sender, instance, raw=False, **kwargs):
+    if not raw:
+        freshness.touch(
+            freshness.author(instance.user_id),
+            freshness.author(instance.author_id),
+        )
+
+
+@receiver(post_save, sender=Post)
+def retain_image(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else getattr(instance, '_previous_image', None)
+    if (previous or '') != (instance.image.name or ''):
+        media.retain(instance.image.name)
+        media.release(previous)
+    instance._previous_image = instance.image.name
+
+
+@receiver(post_save, sender=Post)
+def prepare_thumbnails(sender, instance, raw=False, **kwargs):
+    if not raw and instance.image and not instance.thumbnails:
+        thumbnails.schedule(instance.image)
+
+
+@receiver(post_delete, sender=Post)
+def release_image(sender, instance, **kwargs):
+    media.release(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+def announce_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        events.post_created(instance)
+
+
+@receiver(post_save, sender=Comment)
+def announce_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        events.comment_created(instance)
+
+
+@receiver(post_save, sender=Post)
+def rank_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        trending.post_published(instance)
+
+
+@receiver(post_save, sender=Comment)
+def rank_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        trending.comment_added(instance)
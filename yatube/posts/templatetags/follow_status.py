@@ -0,0 +1,19 @@
+from django import template
+
+from posts import graph
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def followed_authors(context, posts):
+    """id авторов постов страницы, на которых подписан читатель.
+
+    Подписки берутся из кэша графа одним массивом, поэтому страница
+    не проверяет подписку на каждого автора отдельным запросом.
+    """
+    user = context.get('user')
+    if user is None or not user.is_authenticated:
+        return set()
+    return graph.followed_among(
+        user.pk, {post.author_id for post in posts})
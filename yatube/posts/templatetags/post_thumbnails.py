@@ -0,0 +1,13 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(post, size):
+    """Готовая миниатюра картинки поста или None, пока она создаётся."""
+    if not post.image:
+        return None
+    return thumbnails.lookup(post, size)
@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(COMMENTS_PAGE=2)
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Комментарий {i}')
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse('posts:post_comments', args=[self.post.pk])
+
+    def test_first_page_is_rendered_with_the_post(self):
+        """На странице поста только первая страница комментариев."""
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk]))
+        comments = response.context['comments']
+        self.assertEqual(list(comments), self.comments[:2])
+        self.assertContains(response, comments.next_cursor)
+
+    def test_fragment_pages(self):
+        """Фрагменты отдают следующие страницы до последней."""
+        cursor = self.client.get(reverse(
+            'posts:post_detail', args=[self.post.pk])).context[
+                'comments'].next_cursor
+        seen = []
+        while cursor:
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertTemplateUsed(response, 'includes/comment_list.html')
+            comments = response.context['comments']
+            seen.extend(comments)
+            cursor = comments.next_cursor
+        self.assertEqual(seen, self.comments[2:])
+
+    def test_json(self):
+        """С format=json страница отдаётся в JSON."""
+        data = self.client.get(self.url, {'format': 'json'}).json()
+        self.assertEqual(
+            [comment['id'] for comment in data['comments']],
+            [comment.pk for comment in self.comments[:2]],
+        )
+        self.assertIsNotNone(data['next_cursor'])
+
+    def test_unknown_post(self):
+        response = self.client.get(
+            reverse('posts:post_comments', args=[self.post.pk + 1]))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,86 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        )
+
+    def revalidate(self, url, client=None):
+        client = client or self.guest_client
+        etag = client.get(url)['ETag']
+        return client.get(url, HTTP_IF_NONE_MATCH=etag).status_code
+
+    def test_unchanged_pages_return_304(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.revalidate(url), HTTPStatus.NOT_MODIFIED)
+                self.assertEqual(
+                    self.revalidate(url, self.authorized_client),
+                    HTTPStatus.NOT_MODIFIED)
+
+    def test_comment_changes_every_page(self):
+        """Новый комментарий меняет ETag лент и страницы поста."""
+        etags = {url: self.guest_client.get(url)['ETag'] for url in self.urls}
+        Comment.objects.create(post=self.post, author=self.user, text='Да')
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_follow_changes_profile(self):
+        url = reverse('posts:profile', args=[self.author.username])
+        etag = self.authorized_client.get(url)['ETag']
+        Follow.objects.create(user=self.user, author=self.author)
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_reader_follows_change_profile(self):
+        """Подписка читателя на другого автора меняет общих подписчиков."""
+        friend = User.objects.create_user(username='friend')
+        Follow.objects.create(user=friend, author=self.author)
+        url = reverse('posts:profile', args=[self.author.username])
+        etag = self.authorized_client.get(url)['ETag']
+        Follow.objects.create(user=self.user, author=friend)
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_validators_depend_on_user(self):
+        """У гостя есть Last-Modified, у пользователя свой ETag без него."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        guest = self.guest_client.get(url)
+        user = self.authorized_client.get(url)
+        self.assertNotEqual(guest['ETag'], user['ETag'])
+        self.assertTrue(guest.has_header('Last-Modified'))
+        self.assertFalse(user.has_header('Last-Modified'))
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=guest['Last-Modified'])
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
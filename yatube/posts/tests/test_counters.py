@@ -0,0 +1,108 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.db.models.signals import post_save
+from django.test import TestCase, TransactionTestCase
+
+from .. import signals
+from ..models import Comment, Follow, Group, Post, Profile
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.follower = User.objects.create_user(username='follower')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def assertCounters(self, **expected):
+        profile = Profile.objects.get(user=self.user)
+        follower = Profile.objects.get(user=self.follower)
+        group = Group.objects.get(pk=self.group.pk)
+        actual = {
+            'posts': profile.posts_count,
+            'followers': profile.followers_count,
+            'following': follower.following_count,
+            'group_posts': group.posts_count,
+        }
+        self.assertEqual(actual, expected)
+
+    def test_counters_follow_changes(self):
+        """Счётчики меняются при создании и удалении записей."""
+        post = Post.objects.create(
+            author=self.user, text='Тестовый пост', group=self.group)
+        follow = Follow.objects.create(user=self.follower, author=self.user)
+        comment = Comment.objects.create(
+            post=post, author=self.follower, text='Комментарий')
+        self.assertCounters(posts=1, followers=1, following=1, group_posts=1)
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 1)
+
+        comment.delete()
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 0)
+        post.group = None
+        post.save()
+        self.assertCounters(posts=1, followers=1, following=1, group_posts=0)
+        follow.delete()
+        post.delete()
+        self.assertCounters(posts=0, followers=0, following=0, group_posts=0)
+
+    def test_group_change_without_extra_query(self):
+        """Смена группы загруженного поста не перечитывает его из базы."""
+        other = Group.objects.create(title='Другая', slug='other')
+        Post.objects.create(author=self.user, text='Пост', group=self.group)
+        post = Post.objects.get()
+        post.group = other
+        with self.assertNumQueries(0):
+            signals.prepare_post_update(Post, post)
+        post.save()
+        post.group = self.group
+        post.save()
+        self.assertCounters(posts=1, followers=0, following=0, group_posts=1)
+        self.assertEqual(Group.objects.get(pk=other.pk).posts_count, 0)
+
+    def test_recount_command_fixes_drift(self):
+        """Команда recount_counters исправляет разошедшиеся счётчики."""
+        Post.objects.bulk_create([
+            Post(author=self.user, text='Без сигналов', group=self.group)
+            for _ in range(3)
+        ])
+        Profile.objects.filter(user=self.follower).delete()
+        self.assertEqual(Profile.objects.get(user=self.user).posts_count, 0)
+        call_command('recount_counters', stdout=StringIO())
+        self.assertCounters(posts=3, followers=0, following=0, group_posts=3)
+
+
+class AtomicCountersTests(TransactionTestCase):
+    def test_failed_save_rolls_back_counters(self):
+        """Счётчики откатываются вместе с неудавшимся сохранением."""
+        user = User.objects.create_user(username='author')
+        follower = User.objects.create_user(username='follower')
+        group = Group.objects.create(title='Группа', slug='test-slug')
+
+        def fail(sender, created, **kwargs):
+            raise DatabaseError('Сбой после изменения счётчиков')
+
+        post_save.connect(fail, sender=Post)
+        post_save.connect(fail, sender=Follow)
+        self.addCleanup(post_save.disconnect, fail, sender=Post)
+        self.addCleanup(post_save.disconnect, fail, sender=Follow)
+        with self.assertRaises(DatabaseError):
+            Post.objects.create(author=user, text='Пост', group=group)
+        with self.assertRaises(DatabaseError):
+            Follow.objects.create(user=follower, author=user)
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(Group.objects.get().posts_count, 0)
+        self.assertEqual(
+            list(Profile.objects.order_by('pk').values_list(
+                'posts_count', 'followers_count', 'following_count')),
+            [(0, 0, 0), (0, 0, 0)])
@@ -0,0 +1,89 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from core import pubsub
+from .. import events
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+def parse(chunk):
+    fields = dict(
+        line.split(': ', 1) for line in chunk.decode().strip().split('\n'))
+    return fields['event'], json.loads(fields['data'])
+
+
+class PublishTests(TransactionTestCase):
+    def test_new_post_and_comment_are_published(self):
+        """Новые пост и комментарий уходят в свои каналы после коммита."""
+        user = User.objects.create_user(username='author')
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        channels = [events.INDEX, events.author(user.pk),
+                    events.group(group.pk)]
+        with pubsub.subscribe(channels) as subscription:
+            post = Post.objects.create(author=user, group=group, text='Пост')
+            received = [subscription.get(1) for _ in channels]
+        self.assertCountEqual(
+            received, [(channel, {'id': post.pk}) for channel in channels])
+        with pubsub.subscribe([events.comments(post.pk)]) as subscription:
+            comment = Comment.objects.create(
+                post=post, author=user, text='Комментарий')
+            self.assertEqual(subscription.get(1)[1], {'id': comment.pk})
+            post.save()
+            self.assertIsNone(subscription.get(0.05))
+
+
+@override_settings(EVENTS_HEARTBEAT=0.01)
+class StreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_stream_forwards_new_posts(self):
+        response = self.client.get(reverse('posts:index_events'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = iter(response.streaming_content)
+        self.assertTrue(next(chunks).startswith(b'retry:'))
+        self.assertEqual(next(chunks), b': ping\n\n')
+        pubsub.publish(events.INDEX, {'id': self.post.pk})
+        event, data = parse(next(chunks))
+        self.assertEqual(event, 'post')
+        self.assertEqual(
+            data, {'id': self.post.pk, 'url': events.post_url(self.post.pk)})
+        response.close()
+
+    def test_reconnect_catches_up(self):
+        """С Last-Event-ID досылаются комментарии, пропущенные клиентом."""
+        comments = [
+            Comment.objects.create(post=self.post, author=self.user, text=i)
+            for i in ('1', '2', '3')
+        ]
+        response = self.client.get(
+            reverse('posts:comment_events', args=[self.post.pk]),
+            HTTP_LAST_EVENT_ID=str(comments[0].pk))
+        chunks = iter(response.streaming_content)
+        next(chunks)
+        self.assertEqual(
+            [parse(next(chunks))[1]['id'] for _ in comments[1:]],
+            [comment.pk for comment in comments[1:]])
+        response.close()
+
+    def test_fragments(self):
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий')
+        response = self.client.get(
+            reverse('posts:post_card', args=[self.post.pk]))
+        self.assertContains(response, f'data-post-id="{self.post.pk}"')
+        response = self.client.get(
+            reverse('posts:comment_card', args=[self.post.pk, comment.pk]))
+        self.assertContains(response, 'Комментарий')
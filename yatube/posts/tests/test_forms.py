@@ -1,3 +1,4 @@
+import hashlib
 import shutil
 import tempfile
 
@@ -65,11 +66,12 @@ class PostFormTests(TestCase):
         self.assertRedirects(response, f'/profile/{self.user.username}/')
         self.assertEqual(Post.objects.count(), 1)
         first_post = Post.objects.first()
+        digest = hashlib.sha256(small_gif).hexdigest()
         fields = {
             first_post.text: form_data['text'],
             first_post.group: self.group,
             first_post.author: self.user,
-            first_post.image: f'posts/{uploaded}',
+            first_post.image: f'posts/{digest[:2]}/{digest}.gif',
         }
         for value, excepted_value in fields.items():
             with self.subTest(value=value):
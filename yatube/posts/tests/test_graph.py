@@ -0,0 +1,192 @@
+from array import array
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError, connection, transaction
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import graph
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader, cls.friend, cls.other, cls.star, cls.fan = [
+            User.objects.create_user(username=name)
+            for name in ('reader', 'friend', 'other', 'star', 'fan')
+        ]
+        for user, author in (
+            (cls.reader, cls.friend),
+            (cls.reader, cls.other),
+            (cls.friend, cls.star),
+            (cls.other, cls.star),
+            (cls.other, cls.fan),
+            (cls.friend, cls.reader),
+        ):
+            Follow.objects.create(user=user, author=author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_adjacency(self):
+        self.assertEqual(
+            list(graph.following(self.reader.pk)),
+            sorted([self.friend.pk, self.other.pk]))
+        self.assertEqual(
+            list(graph.followers(self.star.pk)),
+            sorted([self.friend.pk, self.other.pk]))
+        self.assertTrue(graph.is_following(self.reader.pk, self.friend.pk))
+        self.assertFalse(graph.is_following(self.reader.pk, self.star.pk))
+
+    def test_cached_after_first_read(self):
+        graph.following(self.reader.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                graph.is_following(self.reader.pk, self.other.pk))
+
+    def test_mutual(self):
+        self.assertEqual(
+            graph.mutual(self.reader.pk, self.star.pk),
+            sorted([self.friend.pk, self.other.pk]))
+        self.assertEqual(graph.mutual(self.reader.pk, self.fan.pk),
+                         [self.other.pk])
+
+    def test_suggestions(self):
+        """Выше тот, на кого подписано больше авторов читателя."""
+        self.assertEqual(graph.suggestions(self.reader.pk),
+                         [self.star.pk, self.fan.pk])
+        self.assertEqual(graph.suggestions(self.reader.pk, limit=1),
+                         [self.star.pk])
+        self.assertEqual(
+            graph.suggestions(self.reader.pk, exclude=(self.star.pk,)),
+            [self.fan.pk])
+
+    def test_follow_invalidates_arrays(self):
+        graph.following(self.reader.pk)
+        graph.followers(self.star.pk)
+        Follow.objects.create(user=self.reader, author=self.star)
+        self.assertIn(self.star.pk, graph.following(self.reader.pk))
+        self.assertIn(self.reader.pk, graph.followers(self.star.pk))
+        self.assertNotIn(self.star.pk, graph.suggestions(self.reader.pk))
+        Follow.objects.filter(user=self.reader, author=self.star).delete()
+        self.assertFalse(graph.is_following(self.reader.pk, self.star.pk))
+        self.assertNotIn(self.reader.pk, graph.followers(self.star.pk))
+
+    @override_settings(FOLLOW_SUGGESTIONS=1)
+    def test_profile(self):
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(
+            reverse('posts:profile', args=[self.star.username]))
+        self.assertFalse(response.context['following'])
+        self.assertEqual(response.context['mutual'], [self.friend])
+        self.assertEqual(response.context['mutual_more'], 1)
+        # автор открытого профиля себя же не советует
+        self.assertEqual(response.context['suggestions'], [self.fan])
+        response = client.get(
+            reverse('posts:profile', args=[self.fan.username]))
+        self.assertEqual(response.context['suggestions'], [self.star])
+        client.get(reverse('posts:profile_follow', args=['star']))
+        response = client.get(
+            reverse('posts:profile', args=[self.star.username]))
+        self.assertTrue(response.context['following'])
+        self.assertEqual(response.context['suggestions'], [self.fan])
+
+
+class FollowGraphTransactionTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader, self.star = [
+            User.objects.create_user(username=name)
+            for name in ('reader', 'star')
+        ]
+
+    def test_rolled_back_follow_is_not_cached(self):
+        graph.following(self.reader.pk)
+        with self.assertRaises(DatabaseError), transaction.atomic():
+            Follow.objects.create(user=self.reader, author=self.star)
+            raise DatabaseError('Откат подписки')
+        self.assertFalse(graph.is_following(self.reader.pk, self.star.pk))
+
+    def test_arrays_read_before_commit_are_dropped(self):
+        with transaction.atomic():
+            Follow.objects.create(user=self.reader, author=self.star)
+            # другой запрос успел закэшировать массив без новой подписки
+            cache.set(graph._key(graph.FOLLOWING, self.reader.pk),
+                      array('q'))
+        self.assertTrue(graph.is_following(self.reader.pk, self.star.pk))
+
+
+class FollowButtonsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}') for i in range(6)
+        ]
+        for author in cls.authors:
+            Post.objects.create(author=author, group=cls.group, text='котик')
+        for author in cls.authors[:3]:
+            Follow.objects.create(user=cls.reader, author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_follow_status_in_one_query(self):
+        """Статус подписки на всех авторов страницы — один запрос."""
+        pages = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:search') + '?q=котик',
+        )
+        for url in pages:
+            with self.subTest(url=url):
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                follows = [query for query in queries
+                           if 'FROM "posts_follow"' in query['sql']]
+                self.assertEqual(len(follows), 1)
+                for i, author in enumerate(self.authors):
+                    name = 'profile_unfollow' if i < 3 else 'profile_follow'
+                    self.assertContains(
+                        response, reverse(f'posts:{name}', args=[author]))
+
+    def test_etag_changes_with_follows(self):
+        url = reverse('posts:index')
+        etag = self.client.get(url)['ETag']
+        self.client.get(reverse('posts:profile_follow', args=['author5']))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(
+            response, reverse('posts:profile_unfollow', args=['author5']))
+
+    def test_cached_page_is_not_shared_between_readers(self):
+        """Закэшированная главная не отдаёт одному читателю чужие кнопки."""
+        url = reverse('posts:index')
+        self.assertContains(
+            self.client.get(url),
+            reverse('posts:profile_unfollow', args=['author0']))
+        other = User.objects.create_user(username='other-reader')
+        client = Client()
+        client.force_login(other)
+        response = client.get(url)
+        self.assertNotContains(
+            response, reverse('posts:profile_unfollow', args=['author0']))
+        self.assertContains(
+            response, reverse('posts:profile_follow', args=['author0']))
+        self.assertContains(response, 'Пользователь: other-reader')
+        self.assertNotContains(response, 'Пользователь: reader\n')
+        self.assertNotContains(
+            Client().get(url),
+            reverse('posts:profile_follow', args=['author0']))
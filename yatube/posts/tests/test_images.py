@@ -0,0 +1,66 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from ..forms import PostForm
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_upload(name, image_format, size, mode='RGB', **params):
+    buffer = BytesIO()
+    Image.new(mode, size, 'red').save(buffer, image_format, **params)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    POST_IMAGE_MAX_SIZE=(100, 100),
+    POST_IMAGE_FORMATS=('WEBP', 'JPEG'),
+)
+class ImageUploadTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def clean(self, upload):
+        form = PostForm(data={'text': 'Пост'}, files={'image': upload})
+        self.assertTrue(form.is_valid(), form.errors)
+        return Image.open(form.cleaned_data['image'])
+
+    def test_large_jpeg_is_resized_and_stripped(self):
+        """Большой JPEG уменьшается, теряет EXIF и становится WebP."""
+        exif = Image.Exif()
+        exif[0x010f] = 'Камера'
+        image = self.clean(make_upload(
+            'photo.jpg', 'JPEG', (800, 400), exif=exif.tobytes()))
+        self.assertEqual(image.format, 'WEBP')
+        self.assertEqual(image.size, (100, 50))
+        self.assertNotIn('exif', image.info)
+
+    def test_orientation_is_applied(self):
+        """Поворот из EXIF применяется до удаления метаданных."""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        image = self.clean(make_upload(
+            'photo.jpg', 'JPEG', (80, 40), exif=exif.tobytes()))
+        self.assertEqual(image.size, (40, 80))
+
+    @override_settings(POST_IMAGE_FORMATS=('JPEG',))
+    def test_jpeg_fallback_flattens_alpha(self):
+        image = self.clean(make_upload('logo.png', 'PNG', (50, 50), 'RGBA'))
+        self.assertEqual(image.format, 'JPEG')
+        self.assertEqual(image.mode, 'RGB')
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=1000)
+    def test_too_many_pixels_are_rejected(self):
+        upload = make_upload('huge.png', 'PNG', (100, 100))
+        form = PostForm(data={'text': 'Пост'}, files={'image': upload})
+        self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
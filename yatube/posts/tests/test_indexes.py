@@ -0,0 +1,59 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from .. import timeline
+from ..models import Comment, Follow, Group, Post
+from ..utils import POST_ORDERING
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN есть в SQLite')
+class QueryPlanTests(TestCase):
+    """Ленты читаются по составным индексам, без сортировки."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост')
+
+    def plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return ' | '.join(row[-1] for row in cursor.fetchall())
+
+    def assertUsesIndex(self, queryset, index):
+        plan = self.plan(queryset)
+        self.assertIn(index, plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_group_posts(self):
+        posts = self.group.posts.select_related('author', 'group')
+        self.assertUsesIndex(
+            posts.order_by(*POST_ORDERING)[:10], 'post_group_pub_date_idx')
+
+    def test_profile(self):
+        posts = self.author.posts.select_related('author', 'group')
+        self.assertUsesIndex(
+            posts.order_by(*POST_ORDERING)[:10], 'post_author_pub_date_idx')
+
+    def test_follow_index(self):
+        entries = timeline.entries(self.user).order_by(*timeline.ORDERING)
+        self.assertUsesIndex(entries[:10], 'timeline_user_pub_date_idx')
+
+    def test_comments(self):
+        comments = Comment.objects.filter(post=self.post)
+        self.assertUsesIndex(comments[:20], 'comment_post_created_id_idx')
+
+    def test_followers(self):
+        followers = Follow.objects.filter(
+            author=self.author).values_list('user_id')
+        self.assertUsesIndex(followers, 'follow_author_user_idx')
@@ -0,0 +1,110 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from core.views import media as serve_media
+
+from .. import media
+from ..models import MediaBlob, Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+OTHER_GIF = SMALL_GIF[:-3] + b'\x0B\x00\x3B'
+
+
+def upload(content=SMALL_GIF, name='small.gif'):
+    return SimpleUploadedFile(name, content, content_type='image/gif')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class MediaStorageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, image):
+        return Post.objects.create(author=self.user, text='Пост', image=image)
+
+    def test_same_upload_stored_once(self):
+        """Одинаковые загрузки хранятся одним файлом под хешем."""
+        first = self.create_post(upload())
+        second = self.create_post(upload(name='copy.GIF'))
+        digest = hashlib.sha256(SMALL_GIF).hexdigest()
+        self.assertEqual(first.image.name, f'posts/{digest[:2]}/{digest}.gif')
+        self.assertEqual(second.image.name, first.image.name)
+        directory = os.path.join(TEMP_MEDIA_ROOT, 'posts', digest[:2])
+        self.assertEqual(os.listdir(directory), [f'{digest}.gif'])
+        self.assertEqual(MediaBlob.objects.get(name=first.image.name).refs, 2)
+
+    def test_refs_follow_delete_and_replace(self):
+        """Удаление и замена картинки уменьшают счётчик ссылок."""
+        post = self.create_post(upload())
+        old_name = post.image.name
+        post.image = upload(OTHER_GIF)
+        post.save()
+        old_blob = MediaBlob.objects.get(name=old_name)
+        self.assertEqual(old_blob.refs, 0)
+        self.assertIsNotNone(old_blob.released)
+        new_name = post.image.name
+        self.assertEqual(MediaBlob.objects.get(name=new_name).refs, 1)
+        post.delete()
+        self.assertEqual(MediaBlob.objects.get(name=new_name).refs, 0)
+        self.assertTrue(post.image.storage.exists(new_name))
+
+    def test_collect_removes_unreferenced_after_grace(self):
+        """collect удаляет файл без ссылок только после grace."""
+        keep = self.create_post(upload())
+        gone = self.create_post(upload(OTHER_GIF))
+        name = gone.image.name
+        gone.delete()
+        storage = keep.image.storage
+        self.assertEqual(media.collect(timedelta(hours=1)), [])
+        self.assertTrue(storage.exists(name))
+        MediaBlob.objects.filter(name=name).update(
+            released=timezone.now() - timedelta(hours=2))
+        self.assertEqual(media.collect(timedelta(hours=1), dry_run=True),
+                         [name])
+        self.assertTrue(storage.exists(name))
+        self.assertEqual(media.collect(timedelta(hours=1)), [name])
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(MediaBlob.objects.filter(name=name).exists())
+        self.assertTrue(storage.exists(keep.image.name))
+
+    def test_recount(self):
+        """recount восстанавливает счётчики по таблице постов."""
+        post = self.create_post(upload())
+        MediaBlob.objects.all().delete()
+        media.recount()
+        self.assertEqual(MediaBlob.objects.get(name=post.image.name).refs, 1)
+
+    def test_hashed_media_cached_forever(self):
+        """Файлы с хешем в имени отдаются с бессрочным кэшированием."""
+        post = self.create_post(upload())
+        name = post.image.name
+        request = RequestFactory().get(settings.MEDIA_URL + name)
+        response = serve_media(request, name)
+        self.assertIn('immutable', response['Cache-Control'])
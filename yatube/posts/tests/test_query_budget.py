@@ -0,0 +1,129 @@
+import json
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+
+from core.testing import QueryBudgetTestMixin
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """Представления укладываются в объявленные бюджеты запросов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        Follow.objects.create(user=cls.user, author=cls.author)
+        for i in range(15):
+            # у части постов картинки, у части из них готовы миниатюры
+            cls.post = Post.objects.create(
+                author=cls.author, group=cls.group, text=f'котик {i}',
+                image=cls.upload(i) if i % 3 else None)
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text='комментарий')
+        Post.objects.exclude(image='').filter(pk__gt=cls.post.pk - 8).update(
+            thumbnails=json.dumps({
+                size: f'cache/{size}.jpg' for size in settings.POST_THUMBNAILS
+            }))
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    @staticmethod
+    def upload(number):
+        # картинки разные, чтобы каждая заняла свой файл
+        image = Image.new('RGB', (4, 4), color=(number, 0, 0))
+        data = BytesIO()
+        image.save(data, 'GIF')
+        return SimpleUploadedFile(
+            f'{number}.gif', data.getvalue(), 'image/gif')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_pages(self):
+        pages = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+            reverse('posts:search') + '?q=котик&group=group&author=author',
+            reverse('posts:follow_index'),
+            reverse('posts:post_create'),
+        )
+        for url in pages:
+            with self.subTest(url=url):
+                self.assertWithinQueryBudget(self.authorized_client.get(url))
+        for url in pages[:5]:
+            with self.subTest(url=url, guest=True):
+                cache.clear()
+                self.assertWithinQueryBudget(self.guest_client.get(url))
+
+    def test_actions(self):
+        actions = (
+            (reverse('posts:post_create'), {'text': 'Новый пост',
+                                            'group': self.group.pk}),
+            (reverse('posts:post_create'), {'text': 'Пост с картинкой',
+                                            'group': self.group.pk,
+                                            'image': self.upload(100)}),
+            (reverse('posts:post_edit', args=[self.post.pk]),
+             {'text': 'Исправленный пост', 'group': self.group.pk}),
+            (reverse('posts:add_comment', args=[self.post.pk]),
+             {'text': 'Ещё комментарий'}),
+            (reverse('posts:profile_unfollow', args=[self.author.username]),
+             None),
+            (reverse('posts:profile_follow', args=[self.author.username]),
+             None),
+        )
+        for url, data in actions:
+            with self.subTest(url=url):
+                response = (self.authorized_client.post(url, data) if data
+                            else self.authorized_client.get(url))
+                self.assertWithinQueryBudget(response)
+
+    def test_feeds_read_only_card_fields(self):
+        """Ленты не читают хеш пароля и прочие колонки автора."""
+        pages = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:follow_index'),
+            reverse('posts:trending'),
+        )
+        for url in pages:
+            with self.subTest(url=url):
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.authorized_client.get(url)
+                self.assertTrue(response.context['page_obj'])
+                feed = [
+                    query['sql'] for query in queries
+                    if 'FROM "posts_post"' in query['sql']
+                    or 'FROM "posts_timelineentry"' in query['sql']
+                ]
+                self.assertTrue(feed)
+                for sql in feed:
+                    self.assertNotIn('"auth_user"."password"', sql)
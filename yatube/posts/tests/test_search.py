@@ -0,0 +1,92 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import search
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Котики', slug='cats', description='Про котиков')
+
+    def setUp(self):
+        self.client = Client()
+
+    def find(self, **params):
+        response = self.client.get(reverse('posts:search'), params)
+        self.assertEqual(response.status_code, 200)
+        return list(response.context['page_obj'])
+
+    def test_search_uses_full_text_index(self):
+        """На SQLite поиск идёт через таблицу FTS5."""
+        self.assertIsInstance(search.get_backend(), search.SqliteBackend)
+
+    def test_post_and_comment_text_are_found(self):
+        """Пост находится по своему тексту и по тексту комментария."""
+        by_text = Post.objects.create(author=self.author, text='Рыжий Котик')
+        by_comment = Post.objects.create(author=self.author, text='Фото')
+        Comment.objects.create(
+            post=by_comment, author=self.other, text='Какой котик!')
+        Post.objects.create(author=self.author, text='Про собак')
+        self.assertEqual(self.find(q='котик'), [by_text, by_comment])
+
+    def test_query_without_words(self):
+        """Запрос из одних знаков препинания ничего не находит."""
+        Post.objects.create(author=self.author, text='котик!!!')
+        for query in ('!!!', '-', '"', '*'):
+            with self.subTest(query=query):
+                self.assertEqual(self.find(q=query), [])
+
+    def test_filters_by_group_and_author(self):
+        """Результаты можно ограничить группой и автором."""
+        in_group = Post.objects.create(
+            author=self.author, text='котик в группе', group=self.group)
+        by_other = Post.objects.create(author=self.other, text='чужой котик')
+        self.assertEqual(self.find(q='котик', group='cats'), [in_group])
+        self.assertEqual(self.find(q='котик', author='other'), [by_other])
+
+    def test_index_follows_edits_and_deletes(self):
+        """Индекс обновляется при изменении и удалении поста."""
+        post = Post.objects.create(author=self.author, text='котик')
+        post.text = 'собака'
+        post.save()
+        self.assertEqual(self.find(q='котик'), [])
+        self.assertEqual(self.find(q='собака'), [post])
+        post.delete()
+        self.assertEqual(self.find(q='собака'), [])
+
+    def test_post_delete_removes_comments(self):
+        """Удаление поста одним запросом убирает из индекса и комментарии."""
+        post = Post.objects.create(author=self.author, text='Фото')
+        Comment.objects.bulk_create(
+            Comment(post=post, author=self.other, text='котик')
+            for _ in range(3))
+        search.rebuild()
+        self.assertEqual(self.find(q='котик'), [post])
+        with self.assertNumQueries(1):
+            search.remove_post(post.pk)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {search.TABLE} WHERE post_id = %s',
+                [post.pk])
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_rebuild_command(self):
+        """Команда перестраивает индекс после массовой загрузки."""
+        Post.objects.bulk_create([
+            Post(author=self.author, text=f'котик {i}') for i in range(3)])
+        self.assertEqual(self.find(q='котик'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(self.find(q='котик')), 3)
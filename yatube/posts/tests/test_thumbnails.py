@@ -0,0 +1,100 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import thumbnails
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ThumbnailsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            image=SimpleUploadedFile(
+                name='small.gif',
+                content=small_gif,
+                content_type='image/gif'
+            ),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_page_shows_placeholder_until_thumbnail_is_ready(self):
+        """Пока миниатюры нет, вместо картинки выводится заглушка."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.assertIsNone(thumbnails.lookup(self.post, 'detail'))
+        response = self.client.get(url)
+        self.assertNotContains(response, '<img class="card-img')
+        self.assertContains(response, 'aspect-ratio')
+
+        thumbnails.generate(self.post.image.name)
+        post = Post.objects.get(pk=self.post.pk)
+        thumbnail = thumbnails.lookup(post, 'detail')
+        self.assertIsNotNone(thumbnail)
+        self.assertContains(self.client.get(url), thumbnail.url)
+
+    def test_generate_creates_every_size_and_bumps_version(self):
+        """Создаются миниатюры всех размеров, версия карточки растёт."""
+        version = self.post.version
+        thumbnails.generate(self.post.image.name)
+        post = Post.objects.get(pk=self.post.pk)
+        for size in settings.POST_THUMBNAILS:
+            with self.subTest(size=size):
+                thumbnail = thumbnails.lookup(post, size)
+                self.assertTrue(thumbnail.exists())
+        self.assertEqual(post.version, version + 1)
+
+    def test_feed_does_not_look_thumbnails_up(self):
+        """Лента не ищет и не создаёт миниатюры при отрисовке."""
+        for _ in range(5):
+            Post.objects.create(
+                author=self.user, text='Пост', image=self.post.image.name)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('posts:index'))
+        sql = ' '.join(query['sql'] for query in queries)
+        self.assertNotIn('thumbnail_kvstore', sql)
+        self.assertEqual(thumbnails.missing().count(), 1)
+
+    def test_new_image_resets_thumbnails(self):
+        """Новая картинка поста сбрасывает миниатюры старой."""
+        thumbnails.generate(self.post.image.name)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        self.assertIsNotNone(thumbnails.lookup(post, 'card'))
+        post.image = 'posts/other.gif'
+        post.save()
+        self.assertIsNone(thumbnails.lookup(
+            Post.objects.get(pk=self.post.pk), 'card'))
@@ -0,0 +1,96 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from .. import freshness, graph
+from ..models import Comment, Follow, Group, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TransferTests(TestCase):
+    def setUp(self):
+        author = User.objects.create_user(username='author', password='pass')
+        reader = User.objects.create_user(username='reader')
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        self.post = Post.objects.create(
+            author=author, group=group, text='Пост про котика')
+        Comment.objects.create(post=self.post, author=reader, text='Мило')
+        Follow.objects.create(user=reader, author=author)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def clear(self):
+        User.objects.all().delete()
+        Group.objects.all().delete()
+
+    def assertImported(self):
+        post = Post.objects.select_related('author', 'group').get()
+        self.assertEqual(post.text, self.post.text)
+        self.assertEqual(post.pub_date, self.post.pub_date)
+        self.assertEqual(post.author.username, 'author')
+        self.assertTrue(post.author.check_password('pass'))
+        self.assertEqual(post.group.slug, 'group')
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(post.author.profile.followers_count, 1)
+        self.assertTrue(Follow.objects.filter(
+            user__username='reader', author=post.author).exists())
+        self.assertTrue(TimelineEntry.objects.filter(post=post).exists())
+
+    def transfer(self, *options):
+        call_command('export_yatube', *options, stderr=StringIO())
+        self.clear()
+        out = StringIO()
+        call_command('import_yatube', *options[:1], '--batch-size', '1',
+                     stdout=out)
+        return out.getvalue()
+
+    def test_ndjson_round_trip(self):
+        """Выгрузка в NDJSON загружается обратно с сохранением связей."""
+        path = os.path.join(self.directory, 'dump.ndjson')
+        output = self.transfer(path)
+        self.assertIn('post: 1 строк', output)
+        self.assertImported()
+
+    def test_csv_round_trip(self):
+        """Выгрузка в каталог CSV загружается обратно."""
+        self.transfer(self.directory, '--format', 'csv')
+        self.assertImported()
+
+    def test_existing_rows_are_skipped(self):
+        """Уже существующие пользователи и группы не дублируются."""
+        path = os.path.join(self.directory, 'dump.ndjson')
+        call_command('export_yatube', path, stderr=StringIO())
+        call_command('import_yatube', path, stdout=StringIO())
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_import_refreshes_follow_graph_and_pages(self):
+        """Импорт подписок сбрасывает их массивы и метки свежести."""
+        cache.clear()
+        author = User.objects.get(username='author')
+        fan = User.objects.create_user(username='fan')
+        self.assertFalse(graph.is_following(fan.pk, author.pk))
+        self.assertEqual(graph.followers(author.pk).tolist(),
+                         [User.objects.get(username='reader').pk])
+        stamp, = freshness.stamps(freshness.SITE)
+        path = os.path.join(self.directory, 'follows.ndjson')
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(json.dumps(
+                {'model': 'follow', 'user': 'fan', 'author': 'author'}))
+        call_command('import_yatube', path, stdout=StringIO())
+        self.assertTrue(graph.is_following(fan.pk, author.pk))
+        self.assertIn(fan.pk, graph.followers(author.pk))
+        self.assertNotEqual(freshness.stamps(freshness.SITE), [stamp])
@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import trending
+from ..models import Comment, Follow, Post, TrendingEpoch
+
+User = get_user_model()
+
+
+@override_settings(TRENDING_HALF_LIFE_HOURS=12, TRENDING_MIN_SCORE=0.01)
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.old = Post.objects.create(author=cls.author, text='Старый')
+        cls.new = Post.objects.create(author=cls.author, text='Новый')
+
+    def setUp(self):
+        cache.clear()
+
+    def ranking(self):
+        return list(trending.trending_posts())
+
+    def test_comments_raise_post(self):
+        """Обсуждаемый пост поднимается выше более нового."""
+        self.assertEqual(self.ranking(), [self.new, self.old])
+        for _ in range(2):
+            Comment.objects.create(
+                post=self.old, author=self.reader, text='Комментарий')
+        self.assertEqual(self.ranking(), [self.old, self.new])
+
+    def test_reach_of_author(self):
+        """Пост автора с подписчиками весит больше."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.author, author=self.reader)
+        popular = Post.objects.create(author=self.author, text='Популярный')
+        plain = Post.objects.create(author=self.reader, text='Обычный')
+        popular.refresh_from_db()
+        plain.refresh_from_db()
+        self.assertGreater(popular.trending_score, 0)
+        self.assertAlmostEqual(
+            popular.trending_score, plain.trending_score, places=4)
+        Follow.objects.create(
+            user=User.objects.create_user(username='fan'), author=self.author)
+        louder = Post.objects.create(author=self.author, text='Громче')
+        louder.refresh_from_db()
+        self.assertGreater(louder.trending_score, popular.trending_score)
+
+    def test_compact_rescales_and_drops_old(self):
+        """compact() сохраняет порядок, делит счета и обнуляет малые."""
+        now = timezone.now()
+        Post.objects.filter(pk=self.old.pk).update(trending_score=0.02)
+        Post.objects.filter(pk=self.new.pk).update(trending_score=8.0)
+        TrendingEpoch.objects.filter(pk=1).update(
+            epoch=now - timedelta(hours=24))
+        self.assertEqual(trending.compact(now), 2)
+        self.new.refresh_from_db()
+        self.old.refresh_from_db()
+        self.assertAlmostEqual(self.new.trending_score, 2.0)
+        self.assertEqual(self.old.trending_score, 0)
+        self.assertEqual(trending.get_epoch(), now)
+        self.assertEqual(self.ranking(), [self.new])
+
+    def test_rebuild_matches_incremental(self):
+        """rebuild() даёт те же соотношения счетов, что и события."""
+        Comment.objects.create(post=self.old, author=self.reader, text='1')
+
+        def ratio():
+            old, new = (Post.objects.get(pk=post.pk).trending_score
+                        for post in (self.old, self.new))
+            return old / new
+
+        expected = ratio()
+        Post.objects.update(trending_score=0)
+        trending.rebuild()
+        self.assertAlmostEqual(ratio(), expected, places=4)
+
+    def test_page(self):
+        Comment.objects.create(post=self.old, author=self.reader, text='1')
+        Comment.objects.create(post=self.old, author=self.reader, text='2')
+        response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(
+            list(response.context['page_obj']), [self.old, self.new])
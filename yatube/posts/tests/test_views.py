@@ -5,7 +5,9 @@ from django.conf import settings
 from django.core.cache import cache
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from ..models import Follow, Group, Post
 from ..forms import PostForm
@@ -275,3 +277,96 @@ class PostViewsTests(TestCase):
                         reverse(url_name, args=args), {'page': page})
                     self.assertEqual(
                         len(response.context.get('page_obj')), count)
+
+    def test_cursor_paginator_on_pages(self):
+        """Курсорная пагинация проходит ленту без пропусков и повторов."""
+        TEST_POST_COUNT = 13
+        posts = (
+            Post(
+                author=self.user,
+                text=f'Тестовый пост {index}',
+                group=self.group) for index in range(1, TEST_POST_COUNT))
+        Post.objects.bulk_create(posts)
+        expected = list(Post.objects.order_by('-pub_date', '-pk'))
+        urls = (
+            ('posts:index', None),
+            ('posts:group_list', [PostViewsTests.group.slug]),
+            ('posts:profile', [PostViewsTests.user.username]),
+        )
+        for url_name, args in urls:
+            with self.subTest(url_name=url_name):
+                url = reverse(url_name, args=args)
+                first_page = self.authorized_client.get(url).context[
+                    'page_obj']
+                second_page = self.authorized_client.get(
+                    url, {'cursor': first_page.next_cursor}).context[
+                    'page_obj']
+                self.assertEqual(
+                    list(first_page) + list(second_page), expected)
+                self.assertFalse(second_page.has_next())
+                previous_page = self.authorized_client.get(
+                    url, {'cursor': second_page.previous_cursor}).context[
+                    'page_obj']
+                self.assertEqual(list(previous_page), list(first_page))
+                self.assertFalse(previous_page.has_previous())
+
+    def test_first_page_without_count_and_offset(self):
+        """Первая страница ленты обходится без COUNT(*) и OFFSET."""
+        urls = (
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.user.username]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    self.authorized_client.get(url)
+                sql = ' '.join(query['sql'] for query in queries)
+                self.assertNotIn('COUNT(', sql)
+                self.assertNotIn('OFFSET', sql)
+
+    def test_first_page_next_link_ignores_lagging_count(self):
+        """Ссылка на следующую страницу не зависит от отставшего счётчика."""
+        # bulk_create не обновляет счётчики группы и автора
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Пост {index}', group=self.group)
+            for index in range(12))
+        urls = (
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.user.username]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                page_obj = response.context['page_obj']
+                self.assertTrue(page_obj.has_next())
+                self.assertTrue(page_obj.has_other_pages())
+                self.assertFalse(page_obj.has_previous())
+                self.assertContains(response, 'Следующая')
+
+    def test_invalid_cursor_shows_first_page(self):
+        """Некорректный курсор открывает первую страницу."""
+        response = self.authorized_client.get(
+            reverse('posts:index'), {'cursor': 'не-курсор'})
+        self.assertEqual(list(response.context['page_obj']), [self.post])
+
+    def test_post_card_cache_follows_post_version(self):
+        """Карточка поста берётся из кэша, пока не изменилась версия."""
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        self.authorized_client.get(url)
+        Post.objects.filter(pk=self.post.pk).update(text='Без новой версии')
+        self.assertContains(self.authorized_client.get(url), 'Тестовый пост')
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Новая версия'
+        post.save()
+        self.assertContains(self.authorized_client.get(url), 'Новая версия')
+
+    def test_post_card_version_bumps_on_author_name_change(self):
+        """Смена имени автора обновляет карточки его постов."""
+        version = Post.objects.get(pk=self.post.pk).version
+        self.user.first_name = 'Лев'
+        self.user.save()
+        self.assertEqual(
+            Post.objects.get(pk=self.post.pk).version, version + 1)
+        self.user.save(update_fields=['last_login'])
+        self.assertEqual(
+            Post.objects.get(pk=self.post.pk).version, version + 1)
@@ -0,0 +1,113 @@
+"""Фоновая подготовка миниатюр картинок постов.
+
+Миниатюры всех размеров из settings.POST_THUMBNAILS готовятся пулом
+потоков после сохранения поста с новой картинкой. Имена готовых
+миниатюр записываются в поле Post.thumbnails, поэтому карточка
+поста узнаёт о них из той же строки, что и текст: шаблоны не
+обращаются ни к хранилищу ключей sorl-thumbnail, ни к файлам и
+никогда не уменьшают картинку во время запроса.
+"""
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from . import freshness
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+storage = Post._meta.get_field('image').storage
+
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+        return _executor
+
+
+def lookup(post, size):
+    """Готовая миниатюра картинки поста или None, ничего не создавая."""
+    try:
+        names = json.loads(post.thumbnails or '{}')
+    except ValueError:
+        return None
+    name = names.get(size)
+    return ImageFile(name, default.storage) if name else None
+
+
+def generate(name):
+    """Создаёт все миниатюры картинки и обновляет карточки её постов."""
+    source = ImageFile(name, storage)
+    try:
+        if not storage.exists(name):
+            logger.warning('Картинка %s не найдена', name)
+            return
+    except Exception:
+        logger.warning('Картинка %s недоступна', name, exc_info=True)
+        return
+    names = {
+        size: get_thumbnail(source, geometry, **options).name
+        for size, (geometry, options) in settings.POST_THUMBNAILS.items()
+    }
+    Post.objects.filter(image=name).update(
+        thumbnails=json.dumps(names), version=F('version') + 1)
+    freshness.touch(freshness.SITE)
+
+
+def _run(name):
+    try:
+        generate(name)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры для %s', name)
+    finally:
+        with _lock:
+            _pending.discard(name)
+
+
+def _run_in_worker(name):
+    close_old_connections()
+    try:
+        _run(name)
+    finally:
+        close_old_connections()
+
+
+def _submit(name):
+    with _lock:
+        if name in _pending:
+            return
+        _pending.add(name)
+    if settings.THUMBNAIL_WORKERS:
+        _get_executor().submit(_run_in_worker, name)
+    else:
+        _run(name)
+
+
+def schedule(image):
+    """Ставит картинку в очередь на подготовку миниатюр после коммита."""
+    if image:
+        name = image.name
+        transaction.on_commit(lambda: _submit(name))
+
+
+def missing():
+    """Имена картинок, у постов с которыми ещё нет миниатюр."""
+    posts = Post.objects.filter(thumbnails='').exclude(image='').exclude(
+        image__isnull=True)
+    return posts.order_by().values_list('image', flat=True).distinct()
@@ -0,0 +1,120 @@
+"""Материализованная лента подписок (fan-out-on-write).
+
+При публикации пост раскладывается в ленты всех подписчиков автора,
+поэтому чтение ленты — один диапазон по индексу (user, pub_date, post).
+Посты авторов с очень большим числом подписчиков при публикации не
+раскладываются, а подтягиваются в ленту читателя при её открытии.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Max, Q
+
+from .models import Follow, Post, Profile, TimelineEntry
+from .utils import post_cards
+
+ORDERING = ('-pub_date', '-post_id')
+
+
+def entries(user):
+    """Записи ленты пользователя вместе с постами."""
+    return post_cards(
+        TimelineEntry.objects.filter(user=user), 'post__',
+        fields=('pub_date', 'post'))
+
+
+def _make_entry(user_id, post):
+    return TimelineEntry(
+        user_id=user_id,
+        post_id=post.pk,
+        author_id=post.author_id,
+        pub_date=post.pub_date,
+    )
+
+
+def _bulk_insert(timeline_entries):
+    timeline_entries = iter(timeline_entries)
+    while True:
+        batch = list(islice(timeline_entries, settings.TIMELINE_BATCH_SIZE))
+        if not batch:
+            return
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def _latest_posts(author_id):
+    return Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-pk')[:settings.TIMELINE_BACKFILL_LIMIT]
+
+
+def is_celebrity(author_id):
+    return Profile.objects.filter(
+        user_id=author_id,
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).exists()
+
+
+def fan_out(post):
+    """Добавляет новый пост в ленты подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    _bulk_insert(
+        _make_entry(user_id, post) for user_id in followers.iterator())
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту последние посты автора после подписки."""
+    if is_celebrity(author_id):
+        return
+    _bulk_insert(
+        _make_entry(user_id, post) for post in _latest_posts(author_id))
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты посты автора после отписки."""
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def followed_celebrities(user):
+    return Follow.objects.filter(
+        user=user,
+        author__profile__followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).values_list('author_id', flat=True)
+
+
+def pull_celebrities(user):
+    """Подтягивает в ленту новые посты популярных авторов (fan-out-on-read).
+
+    Для каждого такого автора берутся только посты новее последнего,
+    уже попавшего в ленту пользователя.
+    """
+    authors = list(followed_celebrities(user))
+    if not authors:
+        return
+    latest = dict(
+        TimelineEntry.objects.filter(user=user, author_id__in=authors)
+        .values('author_id').annotate(latest=Max('pub_date'))
+        .values_list('author_id', 'latest')
+    )
+    new_posts = Q()
+    for author_id in authors:
+        if author_id in latest:
+            new_posts |= Q(author_id=author_id,
+                           pub_date__gt=latest[author_id])
+        else:
+            _bulk_insert(
+                _make_entry(user.pk, post)
+                for post in _latest_posts(author_id))
+    if new_posts:
+        _bulk_insert(
+            _make_entry(user.pk, post)
+            for post in Post.objects.filter(new_posts).iterator())
+
+
+def rebuild():
+    """Заполняет ленты заново по всем подпискам, например после импорта."""
+    TimelineEntry.objects.all().delete()
+    follows = Follow.objects.values_list('user_id', 'author_id')
+    for user_id, author_id in follows.iterator():
+        backfill(user_id, author_id)
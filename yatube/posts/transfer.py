@@ -0,0 +1,308 @@
+"""Потоковый импорт и экспорт пользователей, групп, постов и подписок.
+
+Форматы: NDJSON — одна запись на строку с ключом "model", и CSV —
+каталог с отдельным файлом на каждую модель. Связи записываются
+естественными ключами: пользователь — username, группа — slug, пост —
+его id в исходной базе. При импорте они превращаются в новые id через
+словари в памяти, записи вставляются пачками через bulk_create, каждая
+пачка в своей транзакции, а файл читается построчно.
+"""
+import csv
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+MODELS = ('user', 'group', 'post', 'comment', 'follow')
+
+# колонки файла и соответствующие им поля для values_list()
+COLUMNS = {
+    'user': (
+        ('username', 'username'),
+        ('first_name', 'first_name'),
+        ('last_name', 'last_name'),
+        ('email', 'email'),
+        ('password', 'password'),
+        ('is_active', 'is_active'),
+        ('date_joined', 'date_joined'),
+    ),
+    'group': (
+        ('slug', 'slug'),
+        ('title', 'title'),
+        ('description', 'description'),
+    ),
+    'post': (
+        ('id', 'id'),
+        ('author', 'author__username'),
+        ('group', 'group__slug'),
+        ('text', 'text'),
+        ('pub_date', 'pub_date'),
+        ('image', 'image'),
+    ),
+    'comment': (
+        ('post', 'post_id'),
+        ('author', 'author__username'),
+        ('text', 'text'),
+        ('created', 'created'),
+    ),
+    'follow': (
+        ('user', 'user__username'),
+        ('author', 'author__username'),
+    ),
+}
+
+QUERYSETS = {
+    'user': lambda: User.objects.all(),
+    'group': lambda: Group.objects.all(),
+    'post': lambda: Post.objects.all(),
+    'comment': lambda: Comment.objects.all(),
+    'follow': lambda: Follow.objects.all(),
+}
+
+
+def export_rows(model, chunk_size):
+    """Записи модели в виде словарей, без загрузки таблицы в память."""
+    names = [name for name, _ in COLUMNS[model]]
+    lookups = [lookup for _, lookup in COLUMNS[model]]
+    rows = QUERYSETS[model]().order_by('pk').values_list(*lookups)
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield dict(zip(names, row))
+
+
+def _plain(row):
+    # даты пишутся целиком: DjangoJSONEncoder отбрасывает микросекунды
+    return {
+        name: value.isoformat() if isinstance(value, datetime) else value
+        for name, value in row.items()
+    }
+
+
+def write_ndjson(stream, model, rows):
+    count = 0
+    for row in rows:
+        stream.write(json.dumps(
+            {'model': model, **_plain(row)}, ensure_ascii=False))
+        stream.write('\n')
+        count += 1
+    return count
+
+
+def write_csv(directory, model, rows):
+    count = 0
+    path = os.path.join(directory, f'{model}s.csv')
+    with open(path, 'w', newline='', encoding='utf-8') as stream:
+        writer = csv.DictWriter(
+            stream, fieldnames=[name for name, _ in COLUMNS[model]])
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(_plain(row))
+            count += 1
+    return count
+
+
+def read_ndjson(stream):
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+            model = row.pop('model')
+        except (ValueError, KeyError):
+            raise ValueError(f'Строка {number}: некорректная запись')
+        yield model, row
+
+
+def read_csv(directory):
+    for model in MODELS:
+        path = os.path.join(directory, f'{model}s.csv')
+        if not os.path.exists(path):
+            continue
+        with open(path, newline='', encoding='utf-8') as stream:
+            for row in csv.DictReader(stream):
+                yield model, row
+
+
+@contextmanager
+def keep_dates():
+    """Временно отключает auto_now_add, чтобы сохранить даты из файла."""
+    fields = [Post._meta.get_field('pub_date'),
+              Comment._meta.get_field('created')]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _next_id(model):
+    return (model.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+
+
+def _value(model, name, value):
+    if value in (None, ''):
+        return None
+    return model._meta.get_field(name).to_python(value)
+
+
+class Stats:
+    def __init__(self):
+        self.rows = 0
+        self.skipped = 0
+        self.seconds = 0.0
+
+    @property
+    def rate(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class Importer:
+    """Вставляет записи пачками по batch_size, разрешая связи по словарям.
+
+    id новых записей выделяются заранее, начиная с максимального
+    существующего, поэтому на любой базе они известны до вставки.
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.users = dict(User.objects.values_list('username', 'pk'))
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        self.posts = {}
+        # участники загруженных подписок: их массивы в кэше графа устарели
+        self.follow_users = set()
+        self.next_ids = {
+            model: _next_id(model) for model in (User, Group, Post, Comment)}
+        self.stats = {model: Stats() for model in MODELS}
+        self.model = None
+        self.batch = []
+
+    def _allocate(self, model):
+        pk = self.next_ids[model]
+        self.next_ids[model] += 1
+        return pk
+
+    def build_user(self, row):
+        username = row.get('username')
+        if not username or username in self.users:
+            return None
+        pk = self.users[username] = self._allocate(User)
+        return User(
+            pk=pk,
+            username=username,
+            first_name=row.get('first_name') or '',
+            last_name=row.get('last_name') or '',
+            email=row.get('email') or '',
+            password=row.get('password') or make_password(None),
+            is_active=_value(User, 'is_active', row.get('is_active'))
+            is not False,
+            date_joined=_value(User, 'date_joined', row.get('date_joined'))
+            or timezone.now(),
+        )
+
+    def build_group(self, row):
+        slug = row.get('slug')
+        if not slug or slug in self.groups:
+            return None
+        pk = self.groups[slug] = self._allocate(Group)
+        return Group(pk=pk, slug=slug, title=row.get('title') or slug,
+                     description=row.get('description') or '')
+
+    def build_post(self, row):
+        author_id = self.users.get(row.get('author'))
+        group = row.get('group')
+        if author_id is None or group and group not in self.groups:
+            return None
+        pk = self._allocate(Post)
+        source_id = _value(Post, 'id', row.get('id'))
+        if source_id is not None:
+            self.posts[source_id] = pk
+        return Post(
+            pk=pk,
+            author_id=author_id,
+            group_id=self.groups.get(group) if group else None,
+            text=row.get('text') or '',
+            pub_date=_value(Post, 'pub_date', row.get('pub_date'))
+            or timezone.now(),
+            image=row.get('image') or '',
+        )
+
+    def build_comment(self, row):
+        post_id = self.posts.get(_value(Post, 'id', row.get('post')))
+        author_id = self.users.get(row.get('author'))
+        if post_id is None or author_id is None:
+            return None
+        return Comment(
+            pk=self._allocate(Comment),
+            post_id=post_id,
+            author_id=author_id,
+            text=row.get('text') or '',
+            created=_value(Comment, 'created', row.get('created'))
+            or timezone.now(),
+        )
+
+    def build_follow(self, row):
+        user_id = self.users.get(row.get('user'))
+        author_id = self.users.get(row.get('author'))
+        if user_id is None or author_id is None or user_id == author_id:
+            return None
+        self.follow_users.update((user_id, author_id))
+        return Follow(user_id=user_id, author_id=author_id)
+
+    def add(self, model, row):
+        if model not in self.stats:
+            raise ValueError(f'Неизвестная модель: {model}')
+        if model != self.model:
+            self.flush()
+            self.model = model
+        started = time.monotonic()
+        instance = getattr(self, f'build_{model}')(row)
+        self.stats[model].seconds += time.monotonic() - started
+        if instance is None:
+            self.stats[model].skipped += 1
+            return
+        self.batch.append(instance)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.batch:
+            return
+        started = time.monotonic()
+        with transaction.atomic():
+            type(self.batch[0]).objects.bulk_create(
+                self.batch, ignore_conflicts=self.model == 'follow')
+        stats = self.stats[self.model]
+        stats.seconds += time.monotonic() - started
+        stats.rows += len(self.batch)
+        self.batch = []
+
+    def run(self, records):
+        with keep_dates():
+            for model, row in records:
+                self.add(model, row)
+            self.flush()
+        reset_sequences()
+        return self.stats
+
+
+def reset_sequences():
+    """Сдвигает счётчики id после вставки записей с явными id."""
+    statements = connection.ops.sequence_reset_sql(
+        no_style(), [User, Group, Post, Comment])
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
@@ -0,0 +1,124 @@
+"""Популярные посты: счёт с затуханием, который обновляется по событиям.
+
+Событие в момент t добавляет к счёту поста w · 2^((t − epoch) / H), где
+H — период полураспада TRENDING_HALF_LIFE_HOURS. Так вклад любого
+события относительно более новых уменьшается вдвое за каждые H часов,
+но хранимые счета не нужно пересчитывать со временем: порядок постов по
+ним и есть порядок по счёту с затуханием. Поэтому страница /trending/ —
+одно чтение по индексу (-trending_score, -id).
+
+Множитель растёт со временем, и compact() раз в сутки переносит epoch
+на текущий момент: одним UPDATE делит все счета на набежавший множитель
+и обнуляет пренебрежимо малые, после чего посты выпадают из выборки.
+
+Вес публикации растёт с охватом автора — log2(2 + подписчики), вес
+каждого комментария — TRENDING_COMMENT_WEIGHT, так что пост, который
+часто комментируют прямо сейчас, поднимается выше.
+"""
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Subquery, Value, When
+from django.db.models.functions import Coalesce, Log
+from django.utils import timezone
+
+from .models import Comment, Post, Profile, TrendingEpoch
+
+ORDERING = ('-trending_score', '-pk')
+# события старше стольких периодов полураспада на счёт уже не влияют
+HORIZON_HALF_LIVES = 20
+
+
+def _half_life():
+    return timedelta(hours=settings.TRENDING_HALF_LIFE_HOURS)
+
+
+def get_epoch():
+    epoch = TrendingEpoch.objects.values_list('epoch', flat=True).first()
+    if epoch is None:
+        epoch = TrendingEpoch.objects.get_or_create(
+            pk=1, defaults={'epoch': timezone.now()})[0].epoch
+    return epoch
+
+
+def boost(moment, epoch):
+    return 2 ** ((moment - epoch) / _half_life())
+
+
+def reach_weight(followers):
+    return math.log2(2 + followers)
+
+
+def _add(post_id, weight, moment):
+    Post.objects.filter(pk=post_id).update(
+        trending_score=F('trending_score') + weight * boost(
+            moment, get_epoch()))
+
+
+def post_published(post):
+    # охват автора читается подзапросом в том же UPDATE
+    followers = Profile.objects.filter(user_id=post.author_id).values(
+        'followers_count')
+    weight = Log(2.0, 2.0 + Coalesce(Subquery(followers), 0))
+    _add(post.pk, weight, post.pub_date)
+
+
+def comment_added(comment):
+    _add(comment.post_id, settings.TRENDING_COMMENT_WEIGHT, comment.created)
+
+
+def trending_posts():
+    return Post.objects.filter(trending_score__gt=0).order_by(*ORDERING)
+
+
+def compact(now=None):
+    """Переносит epoch на now и возвращает число изменённых постов."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        state, _ = TrendingEpoch.objects.select_for_update().get_or_create(
+            pk=1, defaults={'epoch': now})
+        factor = 1 / boost(now, state.epoch)
+        changed = Post.objects.filter(trending_score__gt=0).update(
+            trending_score=Case(
+                When(trending_score__lt=settings.TRENDING_MIN_SCORE / factor,
+                     then=Value(0.0)),
+                default=F('trending_score') * factor,
+                output_field=FloatField(),
+            ))
+        state.epoch = now
+        state.save(update_fields=['epoch'])
+    return changed
+
+
+def rebuild(now=None, batch_size=500):
+    """Считает счета заново по постам и комментариям за горизонт."""
+    now = now or timezone.now()
+    since = now - _half_life() * HORIZON_HALF_LIVES
+    reach = dict(Profile.objects.values_list('user_id', 'followers_count'))
+    scores = {}
+    posts = Post.objects.filter(pub_date__gte=since).values_list(
+        'pk', 'author_id', 'pub_date')
+    for pk, author_id, pub_date in posts.iterator():
+        scores[pk] = reach_weight(reach.get(author_id, 0)) * boost(
+            pub_date, now)
+    comments = Comment.objects.filter(created__gte=since).values_list(
+        'post_id', 'created')
+    for post_id, created in comments.iterator():
+        scores[post_id] = scores.get(post_id, 0) + (
+            settings.TRENDING_COMMENT_WEIGHT * boost(created, now))
+    with transaction.atomic():
+        TrendingEpoch.objects.update_or_create(
+            pk=1, defaults={'epoch': now})
+        Post.objects.filter(trending_score__gt=0).update(trending_score=0)
+        Post.objects.bulk_update(
+            [
+                Post(pk=pk, trending_score=score)
+                for pk, score in scores.items()
+                if score >= settings.TRENDING_MIN_SCORE
+            ],
+            ['trending_score'],
+            batch_size=batch_size,
+        )
+    return len(scores)
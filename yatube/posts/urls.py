@@ -12,7 +12,34 @@ urlpatterns = [
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path(
         'posts/<int:post_id>/comment/', views.add_comment, name='add_comment'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
+    path(
+        'posts/<int:post_id>/comments/<int:comment_id>/',
+        views.comment_card,
+        name='comment_card'
+    ),
+    path(
+        'posts/<int:post_id>/comments/events/',
+        views.comment_events,
+        name='comment_events'
+    ),
+    path('posts/<int:post_id>/card/', views.post_card, name='post_card'),
+    path('events/', views.index_events, name='index_events'),
+    path(
+        'group/<slug:slug>/events/', views.group_events, name='group_events'),
+    path(
+        'profile/<str:username>/events/',
+        views.profile_events,
+        name='profile_events'
+    ),
+    path('follow/events/', views.follow_events, name='follow_events'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('trending/', views.trending_index, name='trending'),
+    path('search/', views.search, name='search'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
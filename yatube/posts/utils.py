@@ -0,0 +1,248 @@
+import base64
+import json
+
+from django.conf import settings
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+CURSOR_NEXT = 'n'
+CURSOR_PREVIOUS = 'p'
+
+POST_ORDERING = ('-pub_date', '-pk')
+COMMENT_ORDERING = ('created', 'pk')
+
+# поля, которые выводит карточка поста в ленте: от автора и группы
+# читаются только они, без хеша пароля и остальных колонок auth_user
+POST_CARD_FIELDS = (
+    'text', 'pub_date', 'image', 'thumbnails', 'comments_count', 'version',
+    'author', 'group',
+)
+AUTHOR_CARD_FIELDS = ('username', 'first_name', 'last_name')
+GROUP_CARD_FIELDS = ('slug', 'title')
+COMMENT_CARD_FIELDS = (
+    'post', 'author', 'text', 'created',
+    *(f'author__{name}' for name in AUTHOR_CARD_FIELDS),
+)
+
+
+def post_card_fields(prefix=''):
+    """Поля карточки для only(); prefix — путь до поста, например post__."""
+    return (
+        [prefix + name for name in POST_CARD_FIELDS]
+        + [f'{prefix}author__{name}' for name in AUTHOR_CARD_FIELDS]
+        + [f'{prefix}group__{name}' for name in GROUP_CARD_FIELDS]
+    )
+
+
+def post_cards(queryset, prefix='', fields=()):
+    """Посты с автором и группой одним запросом, только поля карточки.
+
+    fields — дополнительные поля основной модели queryset.
+    """
+    return queryset.select_related(
+        f'{prefix}author', f'{prefix}group').only(
+            *fields, *post_card_fields(prefix))
+
+
+class CountedPaginator(Paginator):
+    """Paginator, которому общее число записей передают готовым.
+
+    count — число или функция без аргументов, например чтение
+    денормализованного счётчика или значения из кэша вместо COUNT(*).
+    Счётчик может немного отставать, поэтому страница всегда берётся
+    целиком, а не обрезается по count.
+    """
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+
+    @cached_property
+    def count(self):
+        return self._count() if callable(self._count) else self._count
+
+    def validate_number(self, number):
+        # отставший счётчик не должен прятать последние страницы: номер
+        # за пределами count проверяется по самой выборке в page()
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            number = int(number)
+            if number < 1:
+                raise
+            return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(self.object_list[bottom:bottom + self.per_page])
+        if not object_list and number > 1:
+            raise EmptyPage('That page contains no results')
+        return self._get_page(object_list, number, self)
+
+
+class CursorPage(Page):
+    """Страница курсорной пагинации.
+
+    Номера страницы и общего количества записей нет: вместо них
+    страница знает курсоры на соседние страницы.
+    """
+
+    def __init__(self, object_list, paginator,
+                 next_cursor=None, previous_cursor=None):
+        super().__init__(object_list, None, paginator)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class CursorPaginator:
+    """Пагинация по ключу (keyset) вместо LIMIT/OFFSET.
+
+    Курсор хранит значения полей сортировки граничной записи, и каждая
+    страница выбирается диапазоном по индексу с LIMIT, поэтому её
+    стоимость не зависит от глубины. COUNT(*) не выполняется.
+    """
+
+    def __init__(self, object_list, per_page, ordering=POST_ORDERING):
+        self.per_page = per_page
+        self.descending = ordering[0].startswith('-')
+        self.fields = [name.lstrip('-') for name in ordering]
+        self.object_list = object_list.order_by(*ordering)
+
+    def _field(self, name):
+        opts = self.object_list.model._meta
+        return opts.pk if name == 'pk' else opts.get_field(name)
+
+    def cursor(self, direction, item):
+        # item — объект модели или строка values() в виде словаря
+        values = [
+            str(item[name] if isinstance(item, dict) else getattr(item, name))
+            for name in self.fields
+        ]
+        token = json.dumps([direction] + values).encode()
+        return base64.urlsafe_b64encode(token).decode().rstrip('=')
+
+    def decode(self, cursor):
+        padding = '=' * (-len(cursor) % 4)
+        try:
+            direction, *values = json.loads(
+                base64.urlsafe_b64decode(cursor + padding))
+        except (TypeError, ValueError):
+            raise ValueError('Некорректный курсор')
+        if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS):
+            raise ValueError('Некорректный курсор')
+        if len(values) != len(self.fields):
+            raise ValueError('Некорректный курсор')
+        values = [
+            self._field(name).to_python(value)
+            for name, value in zip(self.fields, values)
+        ]
+        return direction, values
+
+    def _seek(self, direction, values):
+        forward = direction == CURSOR_NEXT
+        lookup = 'lt' if self.descending == forward else 'gt'
+        first, second = self.fields
+        return (
+            Q(**{f'{first}__{lookup}': values[0]})
+            | Q(**{first: values[0], f'{second}__{lookup}': values[1]})
+        )
+
+    def get_page(self, cursor=None):
+        direction, values = CURSOR_NEXT, None
+        if cursor:
+            try:
+                direction, values = self.decode(cursor)
+            except ValueError:
+                pass
+        queryset = self.object_list
+        if values is not None:
+            queryset = queryset.filter(self._seek(direction, values))
+        if direction == CURSOR_PREVIOUS:
+            queryset = queryset.reverse()
+        items = list(queryset[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if direction == CURSOR_PREVIOUS:
+            items.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+        return CursorPage(
+            items,
+            self,
+            next_cursor=(
+                self.cursor(CURSOR_NEXT, items[-1])
+                if has_next and items else None
+            ),
+            previous_cursor=(
+                self.cursor(CURSOR_PREVIOUS, items[0])
+                if has_previous and items else None
+            ),
+        )
+
+
+def first_page(cursor_paginator, paginator):
+    """Первая страница без COUNT(*) и OFFSET.
+
+    Выбирается на одну запись больше страницы: по ней видно, есть ли
+    следующая. Общее число записей paginator считает, только когда
+    шаблон выводит номера страниц, поэтому count можно передать
+    функцией, читающей счётчик объекта, загруженного параллельно.
+    """
+    per_page = cursor_paginator.per_page
+    items = list(cursor_paginator.object_list[:per_page + 1])
+    page_obj = paginator._get_page(items[:per_page], 1, paginator)
+    page_obj.previous_cursor = None
+    page_obj.next_cursor = (
+        cursor_paginator.cursor(CURSOR_NEXT, items[per_page - 1])
+        if len(items) > per_page else None
+    )
+    # есть ли следующая страница, знает лишняя запись, а не счётчик:
+    # отстающий счётчик не должен прятать ссылку «Следующая»
+    has_next = page_obj.next_cursor is not None
+    page_obj.has_next = page_obj.has_other_pages = lambda: has_next
+    return page_obj
+
+
+def paginate(queryset, request, ordering=POST_ORDERING, count=None):
+    """Возвращает страницу по ?cursor=, а при его отсутствии по ?page=N.
+
+    Обычные страницы тоже получают курсоры на соседние страницы, чтобы
+    ссылки «Следующая» и «Предыдущая» вели в курсорный режим. Если
+    передан count, общее число записей берётся из него, а не из COUNT(*).
+    """
+    cursor_paginator = CursorPaginator(
+        queryset, settings.PAGINATE_PAGE, ordering)
+    cursor = request.GET.get('cursor')
+    if cursor:
+        return cursor_paginator.get_page(cursor)
+    if count is None:
+        paginator = Paginator(
+            cursor_paginator.object_list, settings.PAGINATE_PAGE)
+    else:
+        paginator = CountedPaginator(
+            cursor_paginator.object_list, settings.PAGINATE_PAGE, count)
+    if request.GET.get('page', '1') == '1':
+        return first_page(cursor_paginator, paginator)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    page_obj.next_cursor = page_obj.previous_cursor = None
+    if not len(page_obj):
+        return page_obj
+    if page_obj.has_next():
+        page_obj.next_cursor = cursor_paginator.cursor(
+            CURSOR_NEXT, page_obj[-1])
+    if page_obj.has_previous():
+        page_obj.previous_cursor = cursor_paginator.cursor(
+            CURSOR_PREVIOUS, page_obj[0])
+    return page_obj
@@ -1,36 +1,123 @@
+from functools import wraps
+
 from django.shortcuts import render, get_object_or_404
 from django.shortcuts import redirect
 from django.views.decorators.cache import cache_page
-from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
 from django.conf import settings
-from .models import Post, Group, Follow, User
-from .forms import PostForm, CommentForm
+from django.core.paginator import Paginator
+from django.http import JsonResponse
+from core.cache import get_or_set
+from core.parallel import gather
+from core.queries import query_budget
+from .models import Comment, Post, Group, Follow, User
+from .forms import PostForm, CommentForm, SearchForm
+from .utils import (AUTHOR_CARD_FIELDS, COMMENT_CARD_FIELDS, COMMENT_ORDERING,
+                    CursorPaginator, paginate, post_card_fields, post_cards)
+from . import events, freshness, graph, search as search_index
+from . import counters, timeline, trending
+from .freshness import conditional
 
 
-def paginate(queryset, request):
-    paginator = Paginator(queryset, settings.PAGINATE_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    return page_obj
+def follow_signature(request):
+    # кнопки подписки на странице меняются вместе с подписками читателя
+    if request.user.is_authenticated:
+        return graph.signature(request.user.pk)
+    return None
+
+
+def cache_page_for_reader(timeout, key_prefix):
+    """cache_page, у которого вошедший читатель получает свою копию.
+
+    В шапке страницы имя читателя, а у постов — его кнопки подписки,
+    поэтому общая копия годится только анонимам. Копия читателя
+    сменяется вместе с его подписками.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            prefix = key_prefix
+            if request.user.is_authenticated:
+                prefix = (f'{key_prefix}:{request.user.pk}:'
+                          f'{follow_signature(request)}')
+            cached_view = cache_page(timeout, key_prefix=prefix)(view)
+            return cached_view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def index_freshness(request):
+    return [freshness.INDEX], follow_signature(request)
+
+
+def group_freshness(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True).first()
+    if group_id is None:
+        return None
+    return [freshness.group(group_id)], follow_signature(request)
+
+
+def profile_freshness(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True).first()
+    if author_id is None:
+        return None
+    return [freshness.author(author_id)], follow_signature(request)
+
+
+def post_freshness(request, post_id):
+    post = Post.objects.filter(pk=post_id).values_list(
+        'author_id', 'version', 'comments_count').first()
+    if post is None:
+        return None
+    author_id, *versions = post
+    return [freshness.author(author_id)], versions
 
 
-@cache_page(20, key_prefix='index_page')
+@query_budget(5)
+@conditional(index_freshness)
+@cache_page_for_reader(20, key_prefix='index_page')
 def index(request):
     template = 'posts/index.html'
-    posts = Post.objects.select_related('author', 'group')
-    page_obj = paginate(posts, request)
+    posts = post_cards(Post.objects.all())
+    page_obj = paginate(posts, request, count=lambda: get_or_set(
+        'index_page:count', Post.objects.count,
+        settings.PAGINATE_COUNT_TIMEOUT))
     context = {
         'page_obj': page_obj,
     }
     return render(request, template, context)
 
 
+def fetch_page(queryset, request, **kwargs):
+    """Страница paginate() с уже загруженными записями."""
+    page_obj = paginate(queryset, request, **kwargs)
+    page_obj.object_list = list(page_obj.object_list)
+    return page_obj
+
+
+@query_budget(4)
+def trending_index(request):
+    # счёт нужен курсору следующей страницы
+    posts = post_cards(trending.trending_posts(), fields=('trending_score',))
+    page_obj = paginate(
+        posts, request, trending.ORDERING, count=lambda: get_or_set(
+            'trending_page:count', trending.trending_posts().count,
+            settings.PAGINATE_COUNT_TIMEOUT))
+    return render(request, 'posts/trending.html', {'page_obj': page_obj})
+
+
+@query_budget(7)
+@conditional(group_freshness)
 def group_posts(request, slug):
     template = 'posts/group_list.html'
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related('author', 'group')
-    page_obj = paginate(posts, request)
+    posts = post_cards(Post.objects.filter(group__slug=slug))
+    group, page_obj = gather(
+        lambda: get_object_or_404(Group, slug=slug),
+        lambda: fetch_page(
+            posts, request, count=lambda: counters.group_posts(slug)),
+    )
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -38,24 +125,54 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+@query_budget(10)
+@conditional(profile_freshness)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.select_related('author', 'group')
-    following = request.user.is_authenticated and Follow.objects.filter(
-        user=request.user, author=author).exists()
-    page_obj = paginate(posts, request)
+    posts = post_cards(Post.objects.filter(author__username=username))
+    author, page_obj = gather(
+        lambda: get_object_or_404(
+            User.objects.select_related('profile'), username=username),
+        lambda: fetch_page(
+            posts, request, count=lambda: counters.author_posts(username)),
+    )
     context = {
         'page_obj': page_obj,
         'author': author,
-        'following': following,
+        'following': False,
     }
+    if request.user.is_authenticated:
+        context.update(follow_context(request.user, author))
     return render(request, 'posts/profile.html', context)
 
 
+def follow_context(user, author):
+    """Подписка, знакомые подписчики автора и советы «кого почитать»."""
+    limit = settings.FOLLOW_SUGGESTIONS
+    mutual = graph.mutual(user.pk, author.pk)
+    suggested = graph.suggestions(user.pk, limit, exclude=(author.pk,))
+    users = {}
+    if mutual or suggested:
+        users = User.objects.only(*AUTHOR_CARD_FIELDS).in_bulk(
+            mutual[:limit] + suggested)
+    return {
+        'following': graph.is_following(user.pk, author.pk),
+        'mutual': [users[pk] for pk in mutual[:limit] if pk in users],
+        'mutual_more': max(len(mutual) - limit, 0),
+        'suggestions': [users[pk] for pk in suggested if pk in users],
+    }
+
+
+@query_budget(5)
+@conditional(post_freshness)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post, comments = gather(
+        lambda: get_object_or_404(
+            Post.objects.select_related('author__profile', 'group').only(
+                *post_card_fields(), 'author__profile__posts_count'),
+            pk=post_id),
+        lambda: comment_page(post_id),
+    )
     form = CommentForm(request.POST or None)
-    comments = post.comments.select_related('author')
     context = {
         'post': post,
         'comments': comments,
@@ -64,6 +181,121 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+def comment_page(post_id, cursor=None):
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author').only(*COMMENT_CARD_FIELDS)
+    return CursorPaginator(
+        comments, settings.COMMENTS_PAGE, COMMENT_ORDERING).get_page(cursor)
+
+
+@query_budget(3)
+def post_comments(request, post_id):
+    """Следующая страница комментариев: HTML-фрагмент или JSON."""
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    comments = comment_page(post_id, request.GET.get('cursor'))
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.pk,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created': comment.created,
+                }
+                for comment in comments
+            ],
+            'next_cursor': comments.next_cursor,
+        })
+    context = {
+        'post_id': post_id,
+        'comments': comments,
+    }
+    return render(request, 'includes/comment_list.html', context)
+
+
+@query_budget(2)
+def post_card(request, post_id):
+    """Карточка поста для ленты: её подгружает браузер по событию SSE."""
+    post = get_object_or_404(post_cards(Post.objects.all()), pk=post_id)
+    return render(request, 'includes/post_card.html', {'post': post})
+
+
+@query_budget(2)
+def comment_card(request, post_id, comment_id):
+    comment = get_object_or_404(
+        Comment.objects.select_related('author').only(*COMMENT_CARD_FIELDS),
+        pk=comment_id, post_id=post_id)
+    return render(request, 'includes/one_comment.html', {'comment': comment})
+
+
+@query_budget(3)
+def index_events(request):
+    return events.stream(request, [events.INDEX], Post.objects.all(),
+                         'post', events.post_url)
+
+
+@query_budget(3)
+def group_events(request, slug):
+    group = get_object_or_404(Group.objects.only('pk'), slug=slug)
+    return events.stream(request, [events.group(group.pk)],
+                         Post.objects.filter(group=group),
+                         'post', events.post_url)
+
+
+@query_budget(3)
+def profile_events(request, username):
+    author = get_object_or_404(User.objects.only('pk'), username=username)
+    return events.stream(request, [events.author(author.pk)],
+                         Post.objects.filter(author=author),
+                         'post', events.post_url)
+
+
+@query_budget(4)
+@login_required
+def follow_events(request):
+    authors = list(Follow.objects.filter(user=request.user).values_list(
+        'author_id', flat=True))
+    return events.stream(request, [events.author(pk) for pk in authors],
+                         Post.objects.filter(author_id__in=authors),
+                         'post', events.post_url)
+
+
+@query_budget(3)
+def comment_events(request, post_id):
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    return events.stream(request, [events.comments(post_id)],
+                         Comment.objects.filter(post_id=post_id),
+                         'comment', events.comment_url(post_id))
+
+
+@query_budget(7)
+def search(request):
+    form = SearchForm(request.GET or None)
+    post_ids = []
+    if form.is_valid():
+        post_ids = search_index.search(
+            form.cleaned_data['q'],
+            group=form.cleaned_data['group'],
+            author=form.cleaned_data['author'],
+        )
+    page_obj = Paginator(post_ids, settings.PAGINATE_PAGE).get_page(
+        request.GET.get('page'))
+    posts = post_cards(Post.objects.all()).in_bulk(
+        page_obj.object_list)
+    page_obj.object_list = [
+        posts[pk] for pk in page_obj.object_list if pk in posts]
+    query = request.GET.copy()
+    query.pop('page', None)
+    context = {
+        'form': form,
+        'page_obj': page_obj,
+        'extra_query': query.urlencode() + '&' if query else '',
+    }
+    return render(request, 'posts/search.html', context)
+
+
+# первая публикация в процессе ещё проверяет, есть ли таблица поиска
+@query_budget(18)
 @login_required
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -78,6 +310,7 @@ def post_create(request):
     return render(request, 'posts/create_post.html', context)
 
 
+@query_budget(13)
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
@@ -88,7 +321,7 @@ def post_edit(request, post_id):
                     instance=post,
                     )
     if form.is_valid():
-        post = form.save()
+        form.save()
         return redirect('posts:post_detail', post_id)
     context = {
         'form': form,
@@ -98,6 +331,7 @@ def post_edit(request, post_id):
     return render(request, 'posts/create_post.html', context)
 
 
+@query_budget(10)
 @login_required
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
@@ -110,18 +344,23 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@query_budget(8)
 @login_required
 def follow_index(request):
-    posts = Post.objects.select_related('author', 'group').filter(
-        author__following__user=request.user
-    )
-    page_obj = paginate(posts, request)
+    timeline.pull_celebrities(request.user)
+    entries = timeline.entries(request.user)
+    page_obj = paginate(
+        entries, request, timeline.ORDERING, count=lambda: get_or_set(
+            f'follow_page:count:{request.user.pk}', entries.count,
+            settings.PAGINATE_COUNT_TIMEOUT))
+    page_obj.object_list = [entry.post for entry in page_obj]
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'posts/follow.html', context)
 
 
+@query_budget(12)
 @login_required
 def profile_follow(request, username):
     user = request.user
@@ -131,6 +370,7 @@ def profile_follow(request, username):
     return redirect('posts:profile', username)
 
 
+@query_budget(10)
 @login_required
 def profile_unfollow(request, username):
     Follow.objects.filter(user=request.user,
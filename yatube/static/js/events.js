@@ -0,0 +1,40 @@
+// Новые посты и комментарии без перезагрузки страницы: сервер
+// присылает по Server-Sent Events только id и адрес фрагмента,
+// а разметка подгружается отдельным запросом.
+(function () {
+  var container = document.querySelector('[data-events]');
+  if (!container || !window.EventSource) {
+    return;
+  }
+
+  function insert(data, position) {
+    fetch(data.url, {credentials: 'same-origin'})
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error(response.statusText);
+        }
+        return response.text();
+      })
+      .then(function (html) {
+        container.insertAdjacentHTML(position, html);
+      })
+      .catch(function () {});
+  }
+
+  var source = new EventSource(container.dataset.events);
+  source.addEventListener('post', function (event) {
+    var data = JSON.parse(event.data);
+    if (!document.querySelector('[data-post-id="' + data.id + '"]')) {
+      insert(data, 'afterbegin');
+    }
+  });
+  source.addEventListener('comment', function (event) {
+    var data = JSON.parse(event.data);
+    // пока не загружены все страницы, комментарий появится на своей
+    if (container.querySelector('[data-more-comments]') ||
+        container.querySelector('[data-comment-id="' + data.id + '"]')) {
+      return;
+    }
+    insert(data, 'beforeend');
+  });
+})();
@@ -11,25 +11,38 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import tempfile
+
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
-# Quick-start development settings - unsuitable for production
-# See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
+# профиль настроек задаётся переменной окружения YATUBE_ENV:
+# dev — разработка (по умолчанию), test — прогон тестов,
+# prod — боевой сервер
+PROFILES = ('dev', 'test', 'prod')
+YATUBE_ENV = os.getenv('YATUBE_ENV', 'dev')
+if YATUBE_ENV not in PROFILES:
+    raise ImproperlyConfigured(
+        f'YATUBE_ENV должен быть одним из {", ".join(PROFILES)}')
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = '101p7pt(*0r2^^acszh0%hp_d$x*xa$*!kaebo=z(8sto%ge#!'
+SECRET_KEY = os.getenv(
+    'YATUBE_SECRET_KEY', '101p7pt(*0r2^^acszh0%hp_d$x*xa$*!kaebo=z(8sto%ge#!')
+if YATUBE_ENV == 'prod' and 'YATUBE_SECRET_KEY' not in os.environ:
+    raise ImproperlyConfigured('В профиле prod задайте YATUBE_SECRET_KEY')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = YATUBE_ENV != 'prod'
 
 ALLOWED_HOSTS = [
     'localhost',
     '127.0.0.1',
     '[::1]',
     'testserver',
+    *filter(None, os.getenv('YATUBE_ALLOWED_HOSTS', '').split(',')),
 ]
 
 
@@ -46,11 +59,16 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'benchmark.apps.BenchmarkConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.QueryBudgetMiddleware',
+    'core.middleware.TemplateProfilerMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -62,12 +80,21 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if not DEBUG:
+    # шаблоны разбираются один раз на процесс, а не на каждый запрос
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -85,17 +112,57 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+# база выбирается переменной окружения YATUBE_DB: sqlite (по умолчанию)
+# или postgresql (нужен psycopg2, параметры — YATUBE_DB_NAME,
+# YATUBE_DB_USER, YATUBE_DB_PASSWORD, YATUBE_DB_HOST, YATUBE_DB_PORT).
+# Соединение с SQLite живёт между запросами CONN_MAX_AGE секунд,
+# PostgreSQL берёт соединения из пула (core.backends.postgresql_pool)
+# и возвращает их туда после каждого запроса
+CONN_MAX_AGE = {'dev': 60, 'test': 0, 'prod': 600}[YATUBE_ENV]
+DATABASE_BACKENDS = {
+    'sqlite': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        'NAME': os.getenv(
+            'YATUBE_DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+    },
+    'postgresql': {
+        'ENGINE': 'core.backends.postgresql_pool',
+        'NAME': os.getenv('YATUBE_DB_NAME', 'yatube'),
+        'USER': os.getenv('YATUBE_DB_USER', 'yatube'),
+        'PASSWORD': os.getenv('YATUBE_DB_PASSWORD', ''),
+        'HOST': os.getenv('YATUBE_DB_HOST', '127.0.0.1'),
+        'PORT': os.getenv('YATUBE_DB_PORT', '5432'),
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'MIN': int(os.getenv('YATUBE_DB_POOL_MIN', '1')),
+            'MAX': int(os.getenv('YATUBE_DB_POOL_MAX', '20')),
+        },
+    },
 }
+DATABASES = {
+    'default': DATABASE_BACKENDS[os.getenv('YATUBE_DB', 'sqlite')],
+}
+# прагмы каждого нового соединения с SQLite (core.db): в режиме WAL
+# чтение не ждёт записи, а synchronous=NORMAL в WAL не теряет данные
+# при падении процесса. В тестах база в памяти, прагмы не нужны
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,
+}
+if YATUBE_ENV == 'test':
+    SQLITE_PRAGMAS = {}
 
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
+if YATUBE_ENV == 'test':
+    # пароли в тестах хешируются быстро
+    PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -132,10 +199,34 @@ USE_TZ = True
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 
 STATIC_URL = '/static/'
+# сюда collectstatic собирает статику: имена с хешем содержимого
+# и сжатые копии (core.staticfiles), откуда её отдаёт
+# core.middleware.StaticFilesMiddleware
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+if not DEBUG:
+    STATICFILES_STORAGE = (
+        'core.staticfiles.CompressedManifestStaticFilesStorage')
+# сколько секунд кэшируются файлы статики без хеша в имени
+STATIC_MAX_AGE = 60
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# загрузки больше этого размера пишутся во временный файл частями,
+# а не собираются в памяти
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+
+# картинки постов (posts.images): предельный размер файла и разрешение,
+# до которого уменьшается картинка, и форматы в порядке предпочтения
+POST_IMAGE_MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 50_000_000
+POST_IMAGE_MAX_SIZE = (2560, 2560)
+POST_IMAGE_FORMATS = ('AVIF', 'WEBP', 'JPEG')
+POST_IMAGE_QUALITY = 80
+# файл картинки без ссылок удаляется командой collect_media не раньше,
+# чем через столько часов
+MEDIA_GC_GRACE_HOURS = 24
+
 # yatube/settings.py
 
 LOGIN_URL = 'users:login'
@@ -150,11 +241,130 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 # указываем количество объектов на странице в пагинации
 PAGINATE_PAGE = 10
+# сколько комментариев показывать за раз под постом
+COMMENTS_PAGE = 20
+# размер страницы JSON API по умолчанию и верхняя граница для ?limit=
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+
+# авторы, у которых больше подписчиков, не раскладывают посты по лентам
+# при публикации: их посты подтягиваются в ленту при чтении
+TIMELINE_FANOUT_LIMIT = 5000
+# сколько последних постов автора добавить в ленту при подписке
+TIMELINE_BACKFILL_LIMIT = 1000
+# размер пачки при массовой вставке записей ленты
+TIMELINE_BATCH_SIZE = 500
+
+# граф подписок в кэше (posts.graph): сколько секунд живут массивы
+# подписок, сколько авторов советовать в профиле и по скольким
+# подпискам читателя их искать
+FOLLOW_GRAPH_TIMEOUT = 24 * 60 * 60
+FOLLOW_SUGGESTIONS = 5
+FOLLOW_GRAPH_SCAN = 200
+
+# размеры миниатюр картинок постов: они готовятся в фоне после загрузки
+POST_THUMBNAILS = {
+    'card': ('960x500', {'crop': 'center', 'upscale': True}),
+    'detail': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+# число потоков, готовящих миниатюры; 0 — готовить сразу после
+# коммита, без пула. Пул включается в профиле prod или переменной
+# окружения: потоки пишут в базу и MEDIA_ROOT в обход транзакции теста
+THUMBNAIL_WORKERS = int(os.getenv(
+    'YATUBE_THUMBNAIL_WORKERS', '2' if YATUBE_ENV == 'prod' else '0'))
+
+# число потоков, в которых представления лент выполняют независимые
+# запросы к базе одновременно (core.parallel); 0 — по очереди в потоке
+# запроса. Пул включается в боевом режиме переменной окружения, тесты
+# работают без него: данные теста не видны другим соединениям
+LOOKUP_WORKERS = int(os.getenv('YATUBE_LOOKUP_WORKERS', '0'))
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# общий для всех воркеров кэш выбирается переменной окружения
+# YATUBE_CACHE: locmem, file или redis (нужен django-redis); по умолчанию
+# в профиле prod — file, иначе locmem
+SHARED_CACHES = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'file': {
+        'BACKEND': 'core.cache.FileBasedCache',
+        'LOCATION': os.getenv(
+            'YATUBE_CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'yatube_cache'),
+        ),
+    },
+    'redis': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.getenv(
+            'YATUBE_CACHE_LOCATION', 'redis://127.0.0.1:6379/1'),
+    },
+}
+CACHE_BACKEND = os.getenv(
+    'YATUBE_CACHE', 'file' if YATUBE_ENV == 'prod' else 'locmem')
+if CACHE_BACKEND not in SHARED_CACHES:
+    raise ImproperlyConfigured(
+        f'YATUBE_CACHE должен быть одним из {", ".join(SHARED_CACHES)}')
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.cache.TieredCache',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            # сколько секунд значение живёт в памяти воркера
+            'LOCAL_TIMEOUT': 0 if CACHE_BACKEND == 'locmem' else 5,
+        },
+    },
+    'shared': SHARED_CACHES[CACHE_BACKEND],
+}
+
+# брокер сообщений для событий о новых постах и комментариях (SSE):
+# local работает в одном процессе, redis — между воркерами (нужен redis)
+PUBSUB_BACKENDS = {
+    'local': {
+        'BACKEND': 'core.pubsub.LocalBroker',
+    },
+    'redis': {
+        'BACKEND': 'core.pubsub.RedisBroker',
+        'OPTIONS': {
+            'url': os.getenv(
+                'YATUBE_PUBSUB_LOCATION', 'redis://127.0.0.1:6379/2'),
+        },
+    },
 }
+PUBSUB = PUBSUB_BACKENDS[os.getenv('YATUBE_PUBSUB', 'local')]
+# раз в сколько секунд поток событий шлёт комментарий, чтобы прокси
+# не закрыли соединение, и через сколько секунд поток завершается
+# (браузер переподключается сам)
+EVENTS_HEARTBEAT = 15
+EVENTS_LIFETIME = 300
+# сколько пропущенных событий досылается при переподключении
+EVENTS_CATCH_UP = 50
+
+# популярные посты (posts.trending): период полураспада счёта в часах,
+# вес одного комментария и счёт, ниже которого пост выпадает из выборки
+TRENDING_HALF_LIFE_HOURS = 12
+TRENDING_COMMENT_WEIGHT = 1.0
+TRENDING_MIN_SCORE = 0.01
+
+# сколько секунд кэшируется общее число постов для пагинации
+PAGINATE_COUNT_TIMEOUT = 20
+
+# сколько лучших результатов поиска показывать
+SEARCH_RESULTS_LIMIT = 1000
+# конфигурация полнотекстового поиска PostgreSQL
+SEARCH_CONFIG = 'russian'
+
+# бюджеты SQL-запросов представлений (core.middleware.QueryBudgetMiddleware):
+# добавлять ли число запросов в заголовки ответа
+QUERY_BUDGET_HEADERS = DEBUG
+# замерять ли отрисовку шаблонов (core.middleware.TemplateProfilerMiddleware)
+# и сколько самых дорогих шаблонов показывать в заголовке Server-Timing
+TEMPLATE_PROFILING = DEBUG
+TEMPLATE_PROFILING_TOP = 10
+# бросать ли исключение при превышении бюджета вместо записи в журнал:
+# в тестах превышение должно ронять тест, а не теряться в журнале
+QUERY_BUDGET_RAISE = YATUBE_ENV == 'test'
+# сколько раз может повториться запрос одной формы, прежде чем это N+1
+QUERY_BUDGET_REPEAT_LIMIT = 3